@@ -20,6 +20,8 @@
 Helper functions for managing date anchors and verifying table access.
 """
 
+from datetime import date, datetime
+from typing import Optional
 import config
 from logging_utils import log_detail, log_warning
 
@@ -62,6 +64,73 @@ def reset_max_price_date():
     _MAX_PRICE_DATE = None
 
 
+_MAX_HOLDING_DATE = None
+
+
+def get_max_holding_date(session) -> Optional[date]:
+    """
+    Get the latest HoldingDate in FACT_POSITION_DAILY_ABOR.
+    
+    Callers pass it as a bind parameter so "latest holdings" queries prune on a
+    constant instead of each re-aggregating the position table (None binds as NULL).
+    
+    Must be called AFTER FACT_POSITION_DAILY_ABOR has been built.
+    
+    Returns:
+        Date of the latest holdings snapshot, or None if the table is empty
+    """
+    global _MAX_HOLDING_DATE
+    if _MAX_HOLDING_DATE is None:
+        result = session.sql(f"""
+            SELECT MAX(HoldingDate) as max_date 
+            FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR
+        """).collect()
+        _MAX_HOLDING_DATE = result[0]['MAX_DATE']
+        if _MAX_HOLDING_DATE:
+            log_detail(f"  Max holding date: {_MAX_HOLDING_DATE}")
+    return _MAX_HOLDING_DATE
+
+
+def reset_max_holding_date():
+    """Reset the cached max holding date (call before rebuilding FACT_POSITION_DAILY_ABOR)."""
+    global _MAX_HOLDING_DATE
+    _MAX_HOLDING_DATE = None
+
+
+_BUILD_DATE = None
+
+
+def get_build_date() -> date:
+    """
+    Get the wall-clock date of the current build, fixed at first use.
+    
+    Demo data stamped with "today" (alert dates, screen dates) uses this so every
+    generator in a build agrees on the date and bound statement parameters stay stable.
+    
+    Returns:
+        datetime.date of the first call in this process
+    """
+    global _BUILD_DATE
+    if _BUILD_DATE is None:
+        _BUILD_DATE = datetime.now().date()
+    return _BUILD_DATE
+
+
+# =============================================================================
+# SESSION CONTEXT
+# =============================================================================
+
+def use_schema(session, schema: str) -> None:
+    """
+    Set the session's current database and schema in one round-trip.
+    
+    Args:
+        session: Active Snowpark session
+        schema: Schema name within config.DATABASE['name']
+    """
+    session.sql(f"USE SCHEMA {config.DATABASE['name']}.{schema}").collect()
+
+
 # =============================================================================
 # TABLE ACCESS VERIFICATION
 # =============================================================================
@@ -86,3 +155,72 @@ def verify_table_access(session, database: str, schema: str, table: str) -> tupl
         error_msg = f"Cannot access {database}.{schema}.{table}: {e}"
         log_warning(error_msg)
         return (False, error_msg)
+
+
+def get_missing_objects(session, database: str, schema: str, names: list) -> list:
+    """
+    Check which tables/views are missing using a single INFORMATION_SCHEMA lookup.
+    
+    Metadata-only query: no plan is compiled against the objects themselves.
+    
+    Args:
+        session: Active Snowpark session
+        database: Database name
+        schema: Schema name
+        names: Table or view names (unquoted, upper-case identifiers)
+    
+    Returns:
+        List of names from `names` that do not exist (empty if all exist)
+    """
+    if not names:
+        return []
+    
+    name_list = ", ".join(f"'{name.upper()}'" for name in names)
+    rows = session.sql(f"""
+        SELECT TABLE_NAME FROM {database}.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_NAME IN ({name_list})
+    """).collect()
+    found = {row['TABLE_NAME'] for row in rows}
+    return [name for name in names if name.upper() not in found]
+
+
+def column_exists(session, database: str, schema: str, table: str, column: str) -> bool:
+    """
+    Check whether a table/view has a column using INFORMATION_SCHEMA (metadata only).
+    
+    Args:
+        session: Active Snowpark session
+        database: Database name
+        schema: Schema name
+        table: Table or view name
+        column: Column name
+    
+    Returns:
+        True if the column exists
+    """
+    return bool(session.sql(f"""
+        SELECT 1 FROM {database}.INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_NAME = '{table.upper()}'
+          AND COLUMN_NAME = '{column.upper()}'
+        LIMIT 1
+    """).collect())
+
+
+def get_table_row_counts(session, tables: list) -> dict:
+    """
+    Get row counts for several tables in a single round-trip.
+    
+    Args:
+        session: Active Snowpark session
+        tables: Fully qualified table or view names
+    
+    Returns:
+        Dict mapping each table name to its row count
+    """
+    if not tables:
+        return {}
+    
+    count_sql = " UNION ALL ".join(
+        f"SELECT '{table}' as TABLE_NAME, COUNT(*) as CNT FROM {table}" for table in tables
+    )
+    return {row['TABLE_NAME']: row['CNT'] for row in session.sql(count_sql).collect()}
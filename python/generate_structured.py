@@ -29,10 +29,11 @@ from typing import List
 import random
 from datetime import datetime, timedelta, date
 import config
-from logging_utils import log_detail, log_info, log_warning, log_error, log_success
-from db_helpers import get_max_price_date
-from sql_utils import safe_sql_tuple
-from demo_helpers import build_demo_portfolios_sql_mapping, get_demo_portfolio_names, get_demo_clients_sorted, get_demo_company_tickers, get_all_demo_clients_sorted, get_at_risk_client_ids, get_new_client_ids, get_new_demo_clients
+from logging_utils import log_detail, log_info, log_warning, log_error, log_success, is_detail_enabled
+from db_helpers import get_max_price_date, get_max_holding_date, reset_max_holding_date, get_build_date, get_table_row_counts, get_missing_objects, column_exists, use_schema
+from sql_utils import safe_sql_tuple, sql_array_construct, sql_values_rows
+from snowflake_io_utils import cleanup_temp_objects
+from demo_helpers import build_demo_portfolios_sql_mapping, get_demo_portfolio_names, get_demo_clients_sorted, get_demo_company_tickers, get_all_demo_clients_sorted, get_at_risk_client_ids, get_new_demo_clients
 from sql_case_builders import (
     build_sector_case_sql,
     build_country_group_case_sql,
@@ -103,6 +104,13 @@ def create_database_structure(session: Session, recreate_database: bool = True):
             # Incremental mode - skip database creation (assumes setup.sql already created it)
             # This is needed when running from a stored procedure inside the database
             log_info("Skipping database/schema creation (incremental mode - assuming already exists)")
+            
+            # Drop stale Snowpark temp stages/file formats from interrupted runs once per build,
+            # rather than before every write_pandas call
+            cleanup_temp_objects(session, config.DATABASE['name'], [
+                config.DATABASE['schemas']['raw'],
+                config.DATABASE['schemas']['curated'],
+            ])
     except Exception as e:
         log_error(f" Failed to create database structure: {e}")
         raise
@@ -127,9 +135,7 @@ def build_dimension_tables(session: Session, test_mode: bool = False):
     random.seed(config.RNG_SEED)
     
     # Ensure database context is set at the start
-    database_name = config.DATABASE['name']
-    session.sql(f"USE DATABASE {database_name}").collect()
-    session.sql(f"USE SCHEMA {config.DATABASE['schemas']['curated']}").collect()
+    use_schema(session, config.DATABASE['schemas']['curated'])
     
     # Build dimension tables from DEMO_COMPANIES config
     # DIM_ISSUER is the driver table - all other data flows from it
@@ -152,9 +158,7 @@ def build_fact_tables(session: Session, test_mode: bool = False):
     random.seed(config.RNG_SEED)
     
     # Ensure database context is set at the start
-    database_name = config.DATABASE['name']
-    session.sql(f"USE DATABASE {database_name}").collect()
-    session.sql(f"USE SCHEMA {config.DATABASE['schemas']['curated']}").collect()
+    use_schema(session, config.DATABASE['schemas']['curated'])
     
     # Verify max_price_date is available (FACT_STOCK_PRICES must exist)
     max_price_date = get_max_price_date(session)
@@ -175,22 +179,70 @@ def build_fact_tables(session: Session, test_mode: bool = False):
     _run_build_step(build_risk_budget_data, session)
     _run_build_step(build_trading_calendar_data, session)
     _run_build_step(build_client_mandate_data, session)
+    
     _run_build_step(build_tax_implications_data, session)
     
-    # Executive copilot tables (client analytics)
-    _run_build_step(build_dim_client, session, test_mode)
-    _run_build_step(build_fact_client_flows, session, test_mode)
-    _run_build_step(build_fact_fund_flows, session)
+    # Executive Copilot tables (client analytics)
+    _run_build_step(build_client_analytics_tables, session, test_mode)
+    
+    # Middle office fact tables (recent-window inputs are materialized once and shared)
+    _run_build_step(build_shared_recent_context, session)
     
-    # Middle office fact tables
     _run_build_step(build_fact_trade_settlement, session, test_mode)
     _run_build_step(build_fact_reconciliation, session, test_mode)
     _run_build_step(build_fact_nav_calculation, session, test_mode)
-    _run_build_step(build_fact_nav_components, session, test_mode)
-    _run_build_step(build_fact_corporate_actions, session, test_mode)
-    _run_build_step(build_fact_corporate_action_impact, session, test_mode)
+    _run_build_step(build_corporate_action_tables, session, test_mode)
+    
+    # Cash movements read NAV and corporate action impact; cash positions read movements
     _run_build_step(build_fact_cash_movements, session, test_mode)
     _run_build_step(build_fact_cash_positions, session, test_mode)
+    
+    # Last reader of _RECENT_DATES is cash positions; release the shared temp tables
+    _run_build_step(drop_shared_recent_context, session)
+
+
+def build_corporate_action_tables(session: Session, test_mode: bool = False):
+    """
+    Build corporate action tables in dependency order:
+    FACT_CORPORATE_ACTIONS -> FACT_CORPORATE_ACTION_IMPACT.
+    """
+    _run_build_step(build_fact_corporate_actions, session, test_mode)
+    _run_build_step(build_fact_corporate_action_impact, session, test_mode)
+
+
+def build_client_analytics_tables(session: Session, test_mode: bool = False):
+    """
+    Build executive copilot client analytics tables in dependency order:
+    DIM_CLIENT -> FACT_CLIENT_FLOWS -> FACT_FUND_FLOWS.
+    """
+    database_name = config.DATABASE['name']
+    
+    _run_build_step(build_dim_client, session, test_mode)
+    _run_build_step(build_fact_client_flows, session, test_mode)
+    _run_build_step(build_fact_fund_flows, session)
+    
+    # Verify executive tables with one batched count query (detail logging only)
+    if is_detail_enabled():
+        executive_counts = get_table_row_counts(session, [
+            f"{database_name}.CURATED.{table}" for table in ('DIM_CLIENT', 'FACT_CLIENT_FLOWS', 'FACT_FUND_FLOWS')
+        ])
+        for table_name, count in executive_counts.items():
+            log_detail(f"  {table_name}: {count:,} records")
+
+
+def build_performance_tables(session: Session):
+    """
+    Build performance tables that need returns in V_HOLDINGS_WITH_ESG.
+    Must be called AFTER build_security_returns_view() and build_esg_latest_view().
+    """
+    _run_build_step(build_fact_strategy_performance, session)
+    _run_build_step(build_benchmark_comparison_tables, session)
+
+
+def build_benchmark_comparison_tables(session: Session):
+    """Build FACT_BENCHMARK_PERFORMANCE, then the portfolio vs benchmark comparison on top of it."""
+    _run_build_step(build_fact_benchmark_performance, session)
+    _run_build_step(build_portfolio_benchmark_comparison_view, session)
 
 
 def build_foundation_tables(session: Session, test_mode: bool = False):
@@ -204,9 +256,7 @@ def build_foundation_tables(session: Session, test_mode: bool = False):
     random.seed(config.RNG_SEED)
     
     # Ensure database context is set at the start
-    database_name = config.DATABASE['name']
-    session.sql(f"USE DATABASE {database_name}").collect()
-    session.sql(f"USE SCHEMA {config.DATABASE['schemas']['curated']}").collect()
+    use_schema(session, config.DATABASE['schemas']['curated'])
     
     # Always build dimension tables
     build_dimension_tables(session, test_mode)
@@ -540,12 +590,13 @@ def build_dim_supply_chain_relationships(session: Session, test_mode: bool = Fal
     for sector, density in sectors_with_density.items():
         # Get random issuers from this sector (excluding demo companies)
         sector_issuers = session.sql(f"""
-            SELECT DISTINCT i.IssuerID, i.LegalName
-            FROM {database_name}.CURATED.DIM_ISSUER i
-            WHERE i.SIC_DESCRIPTION = '{sector}'
-            AND i.IssuerID NOT IN ({','.join(str(id) for id in issuer_map.values())})
-            ORDER BY RANDOM()
-            LIMIT {5 if test_mode else 15}
+            SELECT IssuerID, LegalName
+            FROM (
+                SELECT DISTINCT i.IssuerID, i.LegalName
+                FROM {database_name}.CURATED.DIM_ISSUER i
+                WHERE i.SIC_DESCRIPTION = '{sector}'
+                AND i.IssuerID NOT IN ({','.join(str(id) for id in issuer_map.values())})
+            ) SAMPLE ({5 if test_mode else 15} ROWS)
         """).collect()
         
         # Create relationships between sector companies
@@ -768,12 +819,17 @@ def build_fact_position_daily_abor(session: Session):
             "FACT_STOCK_PRICES not found - cannot build FACT_POSITION_DAILY_ABOR. "
             "Run generate_market_data.build_price_anchor() first."
         )
+    reset_max_holding_date()
     
     session.sql(f"""
         -- Build ABOR (Accounting Book of Record) positions from transaction history
         -- This creates monthly position snapshots by aggregating transaction data
         -- Upper bound is max_price_date to ensure all positions have available price/return data
-        CREATE OR REPLACE TABLE {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR AS
+        -- Clustered by (HoldingDate, PortfolioID): NAV, reconciliation and latest-holdings
+        -- queries aggregate or filter on these keys
+        CREATE OR REPLACE TABLE {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR
+        CLUSTER BY (HoldingDate, PortfolioID)
+        AS
         WITH monthly_dates AS (
             -- Step 1: Generate month-end dates for position snapshots over {config.YEARS_OF_HISTORY} years of history
             -- Uses LAST_DAY to ensure consistent month-end reporting dates
@@ -1039,8 +1095,9 @@ def build_security_returns_view(session: Session):
         QUALIFY ROW_NUMBER() OVER (PARTITION BY SECURITYID ORDER BY PRICE_DATE DESC) = 1
     """).collect()
     
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.V_SECURITY_RETURNS_LATEST").collect()[0]['CNT']
-    log_detail(f"  Created V_SECURITY_RETURNS_LATEST view with {count:,} securities")
+    if is_detail_enabled():
+        count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.V_SECURITY_RETURNS_LATEST").collect()[0]['CNT']
+        log_detail(f"  Created V_SECURITY_RETURNS_LATEST view with {count:,} securities")
 
 
 def build_esg_latest_view(session: Session):
@@ -1065,8 +1122,9 @@ def build_esg_latest_view(session: Session):
         QUALIFY ROW_NUMBER() OVER (PARTITION BY SecurityID ORDER BY SCORE_DATE DESC) = 1
     """).collect()
     
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.V_ESG_LATEST").collect()[0]['CNT']
-    log_detail(f"  Created V_ESG_LATEST view with {count:,} securities")
+    if is_detail_enabled():
+        count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.V_ESG_LATEST").collect()[0]['CNT']
+        log_detail(f"  Created V_ESG_LATEST view with {count:,} securities")
     
     # Check if returns view exists
     has_returns_view = False
@@ -1403,8 +1461,7 @@ def build_fact_benchmark_performance(session: Session):
     database_name = config.DATABASE['name']
     
     # Ensure database context is set (required for temp stage creation in complex queries)
-    session.sql(f"USE DATABASE {database_name}").collect()
-    session.sql(f"USE SCHEMA {config.DATABASE['schemas']['curated']}").collect()
+    use_schema(session, config.DATABASE['schemas']['curated'])
     
     # Check if required source tables exist
     try:
@@ -1493,8 +1550,9 @@ def build_fact_benchmark_performance(session: Session):
     """).collect()
     
     # Verify creation
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.FACT_BENCHMARK_PERFORMANCE").collect()[0]['CNT']
-    log_detail(f"  Created FACT_BENCHMARK_PERFORMANCE with {count:,} records")
+    if is_detail_enabled():
+        count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.FACT_BENCHMARK_PERFORMANCE").collect()[0]['CNT']
+        log_detail(f"  Created FACT_BENCHMARK_PERFORMANCE with {count:,} records")
 
 
 def build_transaction_cost_data(session: Session):
@@ -1842,8 +1900,8 @@ def build_dim_client(session: Session, test_mode: bool = False):
     - primary_contacts, client_types, regions
     
     I/O Pattern: 
-    - Demo clients: Build in Python, batch write with write_pandas_overwrite
-    - Generated clients: Set-based INSERT...SELECT (no collect-in-loop)
+    - Single CTAS: demo clients from a VALUES clause UNION ALL generated clients
+      from GENERATOR (no write_pandas staging, no follow-up INSERT)
     
     Used by: Executive Copilot for client flow analysis
     Can also be used by: Sales Advisor for client-specific reporting
@@ -1881,8 +1939,8 @@ def build_dim_client(session: Session, test_mode: bool = False):
     # Calculate max priority for tenure formula
     max_priority = max((c['priority'] for c in demo_clients), default=14)
     
-    # Step 1: Build demo client rows in Python (batched pattern)
-    rows = []
+    # Step 1: Build demo client rows from config (rendered as VALUES literals via sql_values_rows)
+    demo_rows = []
     for i, client in enumerate(demo_clients, 1):
         # Calculate middle of AUM range
         aum = (client['aum_range'][0] + client['aum_range'][1]) // 2
@@ -1895,79 +1953,67 @@ def build_dim_client(session: Session, test_mode: bool = False):
             # Established clients: longer tenure based on priority (from config formula)
             tenure_days = tenure_base + (max_priority + 1 - client['priority']) * tenure_multiplier
         
-        contact = contacts[(i - 1) % len(contacts)]
-        
-        rows.append({
-            'CLIENTID': i,
-            'CLIENTNAME': client['client_name'],
-            'CLIENTTYPE': client['client_type'],
-            'REGION': client['region'],
-            'AUM_WITH_SAM': aum,
-            'RELATIONSHIPSTARTDATE': max_price_date - timedelta(days=tenure_days),
-            'PRIMARYCONTACT': contact,
-            'ACCOUNTSTATUS': 'Active'
+        demo_rows.append({
+            'ClientID': i,
+            'ClientName': client['client_name'],
+            'ClientType': client['client_type'],
+            'Region': client['region'],
+            'AUM_with_SAM': aum,
+            'TenureDays': tenure_days,
+            'PrimaryContact': contacts[(i - 1) % len(contacts)],
         })
     
-    # Step 2: Write demo clients using write_pandas (single batch write)
-    import pandas as pd
-    from snowflake_io_utils import cleanup_temp_stages
-    cleanup_temp_stages(session)  # Clean up any leftover temp stages
+    demo_columns = ['ClientID', 'ClientName', 'ClientType', 'Region', 'AUM_with_SAM', 'TenureDays', 'PrimaryContact']
     
-    df = pd.DataFrame(rows)
-    session.write_pandas(
-        df, 'DIM_CLIENT',
-        database=database_name, schema='CURATED',
-        quote_identifiers=False, overwrite=True, auto_create_table=True
-    )
-    
-    # Step 3: Append generated clients via set-based INSERT...SELECT (no collect-in-loop)
-    if num_generated > 0:
-        # Get generated name patterns from config
-        name_patterns = client_config['generated_name_patterns']
-        
-        # Build client name CASE from config
-        num_patterns = len(name_patterns)
-        name_cases = ' '.join([f"WHEN {i} THEN '{p}'" for i, p in enumerate(name_patterns)])
-        name_case_sql = f"CASE MOD(cs.ClientID, {num_patterns}) {name_cases} ELSE '{name_patterns[-1]}' END"
-        
-        # Build client type CASE from config
-        num_types = len(client_types)
-        type_cases = ' '.join([f"WHEN {i} THEN '{t}'" for i, t in enumerate(client_types)])
-        type_case_sql = f"CASE MOD(cs.ClientID, {num_types}) {type_cases} ELSE '{client_types[0]}' END"
-        
-        # Build region CASE from config
-        num_regions = len(regions)
-        region_cases = ' '.join([f"WHEN {i} THEN '{r}'" for i, r in enumerate(regions)])
-        region_case_sql = f"CASE MOD(cs.ClientID, {num_regions}) {region_cases} ELSE '{regions[0]}' END"
-        
-        # Build contact CASE from config (escape single quotes)
-        num_contacts = min(len(contacts), 8)  # Limit to 8 for MOD simplicity
-        contact_cases = ' '.join([f"WHEN {i} THEN '{contacts[i].replace(chr(39), chr(39)+chr(39))}'" for i in range(num_contacts)])
-        contact_case_sql = f"CASE MOD(cs.ClientID, {num_contacts}) {contact_cases} ELSE '{contacts[0].replace(chr(39), chr(39)+chr(39))}' END"
-        
-        session.sql(f"""
-            INSERT INTO {database_name}.CURATED.DIM_CLIENT
-            -- Generated clients (name patterns from config)
+    # Demo client branch; omitted when no demo clients are configured (an empty
+    # VALUES list is a syntax error)
+    demo_clients_sql = f"""
+        -- Demo clients (names from config)
+        SELECT 
+            dc.ClientID,
+            dc.ClientName,
+            dc.ClientType,
+            dc.Region,
+            dc.AUM_with_SAM,
+            DATEADD('day', -dc.TenureDays, '{max_price_date}'::DATE) as RelationshipStartDate,
+            dc.PrimaryContact,
+            'Active' as AccountStatus
+        FROM (VALUES
+            {sql_values_rows(demo_rows, demo_columns)}
+        ) AS dc({", ".join(demo_columns)})
+        UNION ALL""" if demo_rows else ""
+    
+    # Step 2: Build generated-client lookup arrays from config (indexed by MOD(ClientID, n))
+    name_patterns = client_config['generated_name_patterns']
+    num_contacts = min(len(contacts), 8)  # Limit to 8 for MOD simplicity
+    
+    name_sql = f"GET({sql_array_construct(name_patterns)}, MOD(cs.ClientID, {len(name_patterns)}))::VARCHAR"
+    type_sql = f"GET({sql_array_construct(client_types)}, MOD(cs.ClientID, {len(client_types)}))::VARCHAR"
+    region_sql = f"GET({sql_array_construct(regions)}, MOD(cs.ClientID, {len(regions)}))::VARCHAR"
+    contact_sql = f"GET({sql_array_construct(contacts[:num_contacts])}, MOD(cs.ClientID, {num_contacts}))::VARCHAR"
+    
+    # Step 3: Single CTAS - demo clients (VALUES) UNION ALL generated clients (GENERATOR)
+    session.sql(f"""
+        CREATE OR REPLACE TABLE {database_name}.CURATED.DIM_CLIENT AS{demo_clients_sql}
+        -- Generated clients (name patterns from config)
+        SELECT 
+            cs.ClientID,
+            {name_sql} || ' ' || LPAD(cs.ClientID::VARCHAR, 3, '0') as ClientName,
+            {type_sql} as ClientType,
+            {region_sql} as Region,
+            ROUND(UNIFORM({aum_range[0]}, {aum_range[1]}, RANDOM()), -6) as AUM_with_SAM,
+            DATEADD('day', -UNIFORM({tenure_range[0]}, {tenure_range[1]}, RANDOM()), '{max_price_date}'::DATE) as RelationshipStartDate,
+            {contact_sql} as PrimaryContact,
+            'Active' as AccountStatus
+        FROM (
             SELECT 
-                cs.ClientID,
-                {name_case_sql} || ' ' || LPAD(cs.ClientID::VARCHAR, 3, '0') as ClientName,
-                {type_case_sql} as ClientType,
-                {region_case_sql} as Region,
-                ROUND(UNIFORM({aum_range[0]}, {aum_range[1]}, RANDOM()), -6) as AUM_with_SAM,
-                DATEADD('day', -UNIFORM({tenure_range[0]}, {tenure_range[1]}, RANDOM()), '{max_price_date}'::DATE) as RelationshipStartDate,
-                {contact_case_sql} as PrimaryContact,
-                'Active' as AccountStatus
-            FROM (
-                SELECT 
-                    ROW_NUMBER() OVER (ORDER BY RANDOM()) + {num_demo_clients} as ClientID,
-                    seq4() as seed_val
-                FROM TABLE(GENERATOR(ROWCOUNT => {num_generated}))
-            ) cs
-        """).collect()
+                ROW_NUMBER() OVER (ORDER BY RANDOM()) + {num_demo_clients} as ClientID,
+                seq4() as seed_val
+            FROM TABLE(GENERATOR(ROWCOUNT => {num_generated}))
+        ) cs
+    """).collect()
     
-    # Verify creation
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.DIM_CLIENT").collect()[0]['CNT']
-    log_detail(f"  Created DIM_CLIENT with {count} clients ({num_demo_clients} demo + {num_generated} generated)")
+    log_detail(f"  Created DIM_CLIENT ({num_demo_clients} demo + {num_generated} generated clients)")
 
 def build_fact_client_flows(session: Session, test_mode: bool = False):
     """
@@ -2014,24 +2060,47 @@ def build_fact_client_flows(session: Session, test_mode: bool = False):
     growth_vol_range = flow_config['growth_volatility_range']
     flow_prob = flow_config['monthly_flow_probability_pct']
     
+    # Smallest possible unrounded flow (min AUM x min weight x min pct x smallest multiplier).
+    # At >= 5,000 the round-to-10,000 below can never yield zero, so the zero-flow filter is
+    # only emitted when the configured ranges allow it
+    client_config = get_global_value('client')
+    min_aum = min(
+        [client_config['aum_range_usd'][0]] +
+        [(c['aum_range'][0] + c['aum_range'][1]) // 2 for c in get_all_demo_clients_sorted()]
+    )
+    min_flow = min_aum * alloc_range[0] * flow_pct_range[0] * min(1.0, esg_mult, growth_vol_range[0])
+    nonzero_filter_sql = "" if min_flow >= 5000 else "WHERE FlowAmount != 0"
+    
     # Calculate cumulative thresholds for standard flow type assignment
     std_redemption_threshold = std_sub_pct + std_red_pct  # 95 = subscription + redemption, rest is transfer
     
-    # Get at-risk and new client IDs for conditional flow generation
+    # Get at-risk client IDs for conditional flow generation
+    # (new clients are handled via RelationshipStartDate filtering)
     at_risk_ids = get_at_risk_client_ids()
-    new_client_ids = get_new_client_ids()
     
-    # Build SQL-safe list of at-risk client IDs
-    at_risk_ids_sql = f"({','.join(str(id) for id in at_risk_ids)})" if at_risk_ids else "(NULL)"
-    new_client_ids_sql = f"({','.join(str(id) for id in new_client_ids)})" if new_client_ids else "(NULL)"
+    # At-risk client IDs as a VALUES row source (joined once, not inlined as IN lists)
+    at_risk_values_sql = ", ".join(f"({client_id})" for client_id in at_risk_ids) if at_risk_ids else "(NULL)"
+    
+    # FlowID comes from a sequence (no global sort over all flows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_CLIENT_FLOWS").collect()
     
+    # Clustered by FlowDate: FACT_FUND_FLOWS and copilot queries group/filter by recent dates
     session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_CLIENT_FLOWS AS
+        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_CLIENT_FLOWS
+        CLUSTER BY (FlowDate)
+        AS
         WITH 
-        -- Get all clients
+        -- At-risk clients (declining flow pattern)
+        at_risk_clients AS (
+            SELECT column1 as ClientID FROM VALUES {at_risk_values_sql}
+        ),
+        -- Get all clients, flagging at-risk clients via a single hash join
         clients AS (
-            SELECT ClientID, ClientName, ClientType, Region, AUM_with_SAM, RelationshipStartDate
-            FROM {database_name}.CURATED.DIM_CLIENT
+            SELECT 
+                c.ClientID, c.ClientName, c.ClientType, c.Region, c.AUM_with_SAM, c.RelationshipStartDate,
+                ar.ClientID IS NOT NULL as IsAtRisk
+            FROM {database_name}.CURATED.DIM_CLIENT c
+            LEFT JOIN at_risk_clients ar ON c.ClientID = ar.ClientID
         ),
         -- Get all portfolios
         portfolios AS (
@@ -2045,93 +2114,92 @@ def build_fact_client_flows(session: Session, test_mode: bool = False):
         ),
         -- Create client-portfolio assignments (clients invest in 1-3 portfolios)
         -- Distribution based on config: ~20% single, ~30% dual, ~50% triple
+        -- Portfolio IDs are enumerated per client directly (no clients x portfolios cross product);
+        -- unknown IDs drop out at the portfolios join in flow_data
         client_portfolio_map AS (
             SELECT 
                 c.ClientID,
-                p.PortfolioID,
+                f.VALUE::NUMBER as PortfolioID,
                 -- Weight for this client-portfolio pair (for flow sizing) - from config
-                UNIFORM({alloc_range[0]}, {alloc_range[1]}, RANDOM()) as AllocationWeight
-            FROM clients c
-            CROSS JOIN portfolios p
-            WHERE 
+                UNIFORM({alloc_range[0]}, {alloc_range[1]}, RANDOM())::NUMBER(9,4) as AllocationWeight
+            FROM clients c,
+            LATERAL FLATTEN(input => ARRAY_SLICE(
+                ARRAY_CONSTRUCT(MOD(c.ClientID, 10) + 1, MOD(c.ClientID + 3, 10) + 1, MOD(c.ClientID + 6, 10) + 1),
+                0,
                 CASE 
                     -- ~20% of clients (ClientID mod 5 = 0) get only 1 portfolio
-                    WHEN MOD(c.ClientID, 5) = 0 THEN 
-                        p.PortfolioID = MOD(c.ClientID, 10) + 1
+                    WHEN MOD(c.ClientID, 5) = 0 THEN 1
                     -- ~30% of clients (ClientID mod 5 = 1 or 2) get 2 portfolios
-                    WHEN MOD(c.ClientID, 5) IN (1, 2) THEN
-                        p.PortfolioID IN (MOD(c.ClientID, 10) + 1, MOD(c.ClientID + 3, 10) + 1)
+                    WHEN MOD(c.ClientID, 5) IN (1, 2) THEN 2
                     -- ~50% of clients (ClientID mod 5 = 3 or 4) get 3 portfolios
-                    ELSE
-                        p.PortfolioID IN (MOD(c.ClientID, 10) + 1, MOD(c.ClientID + 3, 10) + 1, MOD(c.ClientID + 6, 10) + 1)
+                    ELSE 3
                 END
+            )) f
         ),
-        -- Generate flows with different patterns for different client types
-        flow_data AS (
+        -- Candidate flows with one random draw per purpose per row
+        flow_draws AS (
             SELECT 
-                ROW_NUMBER() OVER (ORDER BY d.FlowDate, cpm.ClientID, cpm.PortfolioID) as FlowID,
                 d.FlowDate,
                 cpm.ClientID,
                 cpm.PortfolioID,
-                -- Flow type: varies by client type (thresholds from config)
+                cpm.AllocationWeight,
+                UNIFORM(0::FLOAT, 100::FLOAT, RANDOM()) as r_type,
+                UNIFORM({flow_pct_range[0]}, {flow_pct_range[1]}, RANDOM()) as r_amount_pct
+            FROM date_range d
+            CROSS JOIN client_portfolio_map cpm
+            -- Not every client-portfolio has a flow every month (probability from config)
+            WHERE UNIFORM(0::FLOAT, 100::FLOAT, RANDOM()) < {flow_prob}
+        ),
+        -- Assign flow type from the single r_type draw (cumulative thresholds from config)
+        flow_data AS (
+            SELECT 
+                fd.FlowDate,
+                fd.ClientID,
+                fd.PortfolioID,
                 CASE 
                     -- At-risk clients: high redemptions (inverted pattern)
-                    WHEN cpm.ClientID IN {at_risk_ids_sql} THEN
-                        CASE 
-                            WHEN UNIFORM(0, 100, RANDOM()) < {at_risk_red_pct} THEN 'Redemption'
-                            ELSE 'Subscription'
-                        END
+                    WHEN c.IsAtRisk THEN
+                        CASE WHEN fd.r_type < {at_risk_red_pct} THEN 'Redemption' ELSE 'Subscription' END
                     -- Standard clients: subscription/redemption/transfer split from config
-                    ELSE
-                        CASE 
-                            WHEN UNIFORM(0, 100, RANDOM()) < {std_sub_pct} THEN 'Subscription'
-                            WHEN UNIFORM(0, 100, RANDOM()) < {std_redemption_threshold} THEN 'Redemption'
-                            ELSE 'Transfer'
-                        END
+                    WHEN fd.r_type < {std_sub_pct} THEN 'Subscription'
+                    WHEN fd.r_type < {std_redemption_threshold} THEN 'Redemption'
+                    ELSE 'Transfer'
                 END as FlowType,
                 -- Flow amount based on client AUM and allocation (percentages from config)
                 ROUND(
-                    c.AUM_with_SAM * cpm.AllocationWeight * 
-                    UNIFORM({flow_pct_range[0]}, {flow_pct_range[1]}, RANDOM()) *
+                    c.AUM_with_SAM * fd.AllocationWeight * fd.r_amount_pct *
                     CASE 
                         -- ESG strategies getting more inflows recently (multiplier from config)
-                        WHEN p.Strategy = 'ESG' AND d.FlowDate > DATEADD('month', -{esg_months}, '{max_price_date}'::DATE) 
-                             AND cpm.ClientID NOT IN {at_risk_ids_sql} THEN {esg_mult}
+                        WHEN p.Strategy = 'ESG' AND fd.FlowDate > DATEADD('month', -{esg_months}, '{max_price_date}'::DATE) 
+                             AND NOT c.IsAtRisk THEN {esg_mult}
                         -- Growth strategies volatile (range from config)
                         WHEN p.Strategy = 'Growth' THEN UNIFORM({growth_vol_range[0]}, {growth_vol_range[1]}, RANDOM())
                         ELSE 1.0
                     END,
                     -4  -- Round to nearest 10,000
                 ) as FlowAmount
-            FROM date_range d
-            CROSS JOIN client_portfolio_map cpm
-            JOIN clients c ON cpm.ClientID = c.ClientID
-            JOIN portfolios p ON cpm.PortfolioID = p.PortfolioID
-            WHERE 
-                -- Not every client-portfolio has a flow every month (probability from config)
-                UNIFORM(0, 100, RANDOM()) < {flow_prob}
-                -- New clients: only have flows after their relationship start date
-                AND d.FlowDate >= c.RelationshipStartDate
+            FROM flow_draws fd
+            JOIN clients c ON fd.ClientID = c.ClientID
+            JOIN portfolios p ON fd.PortfolioID = p.PortfolioID
+            -- New clients: only have flows after their relationship start date
+            WHERE fd.FlowDate >= c.RelationshipStartDate
         )
+        -- Single pipeline: sign flip, filter and FlowID assignment over the final rows
         SELECT 
-            FlowID,
+            {database_name}.CURATED.SEQ_FACT_CLIENT_FLOWS.NEXTVAL as FlowID,
             FlowDate,
             ClientID,
             PortfolioID,
             FlowType,
-            CASE 
+            (CASE 
                 WHEN FlowType = 'Redemption' THEN -ABS(FlowAmount)
                 ELSE ABS(FlowAmount)
-            END as FlowAmount,
+            END)::NUMBER(18,2) as FlowAmount,
             -- Add currency
             'USD' as Currency
         FROM flow_data
-        WHERE FlowAmount != 0
+        {nonzero_filter_sql}
     """).collect()
-    
-    # Verify creation
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.FACT_CLIENT_FLOWS").collect()[0]['CNT']
-    log_detail(f"  Created FACT_CLIENT_FLOWS with {count} flow records")
 
 def build_fact_fund_flows(session: Session):
     """
@@ -2143,8 +2211,12 @@ def build_fact_fund_flows(session: Session):
     """
     database_name = config.DATABASE['name']
     
+    # FundFlowID comes from a sequence (no global sort over the aggregated rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_FUND_FLOWS").collect()
     session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_FUND_FLOWS AS
+        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_FUND_FLOWS
+        CLUSTER BY (FlowDate)
+        AS
         WITH flow_aggregates AS (
             -- Note: PortfolioName, Strategy available via PortfolioID -> DIM_PORTFOLIO join
             SELECT 
@@ -2159,7 +2231,7 @@ def build_fact_fund_flows(session: Session):
             GROUP BY cf.FlowDate, cf.PortfolioID
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY FlowDate, PortfolioID) as FundFlowID,
+            {database_name}.CURATED.SEQ_FACT_FUND_FLOWS.NEXTVAL as FundFlowID,
             FlowDate,
             PortfolioID,
             GrossInflows,
@@ -2170,9 +2242,6 @@ def build_fact_fund_flows(session: Session):
             'USD' as Currency
         FROM flow_aggregates
     """).collect()
-    
-    # Verify creation
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.FACT_FUND_FLOWS").collect()[0]['CNT']
 
 
 def build_fact_strategy_performance(session: Session):
@@ -2187,18 +2256,19 @@ def build_fact_strategy_performance(session: Session):
     """
     database_name = config.DATABASE['name']
     
-    # Check if V_HOLDINGS_WITH_ESG exists with returns data
-    try:
-        session.sql(f"SELECT QTD_RETURN_PCT FROM {database_name}.CURATED.V_HOLDINGS_WITH_ESG LIMIT 1").collect()
-    except Exception as e:
+    # Check if V_HOLDINGS_WITH_ESG exists with returns data (metadata lookup)
+    if not column_exists(session, database_name, 'CURATED', 'V_HOLDINGS_WITH_ESG', 'QTD_RETURN_PCT'):
         raise RuntimeError(
-            f"V_HOLDINGS_WITH_ESG missing returns columns - cannot build FACT_STRATEGY_PERFORMANCE: {e}. "
+            "V_HOLDINGS_WITH_ESG missing returns columns - cannot build FACT_STRATEGY_PERFORMANCE. "
             "Run build_esg_latest_view() after build_security_returns_view() first."
         )
     
-    # Build strategy performance with returns data
+    # Build strategy performance with returns data (StrategyPerfID from a sequence, no global sort)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_STRATEGY_PERFORMANCE").collect()
     session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_STRATEGY_PERFORMANCE AS
+        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_STRATEGY_PERFORMANCE
+        CLUSTER BY (HoldingDate)
+        AS
         WITH portfolio_performance AS (
             -- Note: PortfolioName, Strategy available via PortfolioID -> DIM_PORTFOLIO join
             SELECT 
@@ -2214,21 +2284,23 @@ def build_fact_strategy_performance(session: Session):
             GROUP BY h.HoldingDate, h.PortfolioID
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY HoldingDate, PortfolioID) as StrategyPerfID,
+            {database_name}.CURATED.SEQ_FACT_STRATEGY_PERFORMANCE.NEXTVAL as StrategyPerfID,
             HoldingDate,
             PortfolioID,
-            ROUND(Portfolio_AUM, 2) as Strategy_AUM,
-            ROUND(Weighted_MTD_Return, 2) as Strategy_MTD_Return,
-            ROUND(Weighted_QTD_Return, 2) as Strategy_QTD_Return,
-            ROUND(Weighted_YTD_Return, 2) as Strategy_YTD_Return,
+            -- Narrow fixed-precision types (values are already rounded to 2dp)
+            ROUND(Portfolio_AUM, 2)::NUMBER(18,2) as Strategy_AUM,
+            ROUND(Weighted_MTD_Return, 2)::NUMBER(9,2) as Strategy_MTD_Return,
+            ROUND(Weighted_QTD_Return, 2)::NUMBER(9,2) as Strategy_QTD_Return,
+            ROUND(Weighted_YTD_Return, 2)::NUMBER(9,2) as Strategy_YTD_Return,
             Holding_Count,
             'USD' as Currency
         FROM portfolio_performance
     """).collect()
     
     # Verify creation
-    count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.FACT_STRATEGY_PERFORMANCE").collect()[0]['CNT']
-    log_detail(f"  Created FACT_STRATEGY_PERFORMANCE with {count:,} records")
+    if is_detail_enabled():
+        count = session.sql(f"SELECT COUNT(*) as cnt FROM {database_name}.CURATED.FACT_STRATEGY_PERFORMANCE").collect()[0]['CNT']
+        log_detail(f"  Created FACT_STRATEGY_PERFORMANCE with {count:,} records")
 
 
 def build_portfolio_benchmark_comparison_view(session: Session):
@@ -2239,6 +2311,11 @@ def build_portfolio_benchmark_comparison_view(session: Session):
     are independent fact tables with different granularities. Semantic views cannot
     combine metrics from unrelated fact tables, so we pre-join them here.
     
+    The holding-to-portfolio aggregation is materialized once into
+    FACT_PORTFOLIO_BENCHMARK_COMPARISON at build time; V_PORTFOLIO_BENCHMARK_COMPARISON
+    is a passthrough view over it so semantic view queries do not re-aggregate
+    V_HOLDINGS_WITH_ESG on every request.
+    
     Grain: One row per portfolio per date
     
     Provides:
@@ -2250,18 +2327,16 @@ def build_portfolio_benchmark_comparison_view(session: Session):
     """
     database_name = config.DATABASE['name']
     
-    # Check if required source views/tables exist
-    try:
-        session.sql(f"SELECT 1 FROM {database_name}.CURATED.V_HOLDINGS_WITH_ESG LIMIT 1").collect()
-        session.sql(f"SELECT 1 FROM {database_name}.CURATED.FACT_BENCHMARK_PERFORMANCE LIMIT 1").collect()
-    except Exception as e:
+    # Check if required source views/tables exist (single metadata lookup)
+    missing = get_missing_objects(session, database_name, 'CURATED', ['V_HOLDINGS_WITH_ESG', 'FACT_BENCHMARK_PERFORMANCE'])
+    if missing:
         raise RuntimeError(
-            f"Required tables not found for V_PORTFOLIO_BENCHMARK_COMPARISON: {e}. "
+            f"Required tables not found for V_PORTFOLIO_BENCHMARK_COMPARISON: {', '.join(missing)}. "
             "Ensure V_HOLDINGS_WITH_ESG and FACT_BENCHMARK_PERFORMANCE are built first."
         )
     
     session.sql(f"""
-        CREATE OR REPLACE VIEW {database_name}.CURATED.V_PORTFOLIO_BENCHMARK_COMPARISON AS
+        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_PORTFOLIO_BENCHMARK_COMPARISON AS
         WITH portfolio_returns AS (
             -- Aggregate holding-level returns to portfolio level
             SELECT 
@@ -2300,28 +2375,34 @@ def build_portfolio_benchmark_comparison_view(session: Session):
             pr.BenchmarkID,
             br.BenchmarkName,
             pr.PerformanceDate,
-            -- Portfolio returns
-            ROUND(pr.PORTFOLIO_MTD_RETURN, 2) as PORTFOLIO_MTD_RETURN,
-            ROUND(pr.PORTFOLIO_QTD_RETURN, 2) as PORTFOLIO_QTD_RETURN,
-            ROUND(pr.PORTFOLIO_YTD_RETURN, 2) as PORTFOLIO_YTD_RETURN,
+            -- Portfolio returns (narrow fixed-precision types; values are rounded to 2dp)
+            ROUND(pr.PORTFOLIO_MTD_RETURN, 2)::NUMBER(9,2) as PORTFOLIO_MTD_RETURN,
+            ROUND(pr.PORTFOLIO_QTD_RETURN, 2)::NUMBER(9,2) as PORTFOLIO_QTD_RETURN,
+            ROUND(pr.PORTFOLIO_YTD_RETURN, 2)::NUMBER(9,2) as PORTFOLIO_YTD_RETURN,
             -- Benchmark returns
-            ROUND(br.BENCHMARK_MTD_RETURN, 2) as BENCHMARK_MTD_RETURN,
-            ROUND(br.BENCHMARK_QTD_RETURN, 2) as BENCHMARK_QTD_RETURN,
-            ROUND(br.BENCHMARK_YTD_RETURN, 2) as BENCHMARK_YTD_RETURN,
+            ROUND(br.BENCHMARK_MTD_RETURN, 2)::NUMBER(9,2) as BENCHMARK_MTD_RETURN,
+            ROUND(br.BENCHMARK_QTD_RETURN, 2)::NUMBER(9,2) as BENCHMARK_QTD_RETURN,
+            ROUND(br.BENCHMARK_YTD_RETURN, 2)::NUMBER(9,2) as BENCHMARK_YTD_RETURN,
             -- Active returns (portfolio - benchmark)
-            ROUND(pr.PORTFOLIO_MTD_RETURN - COALESCE(br.BENCHMARK_MTD_RETURN, 0), 2) as ACTIVE_MTD_RETURN,
-            ROUND(pr.PORTFOLIO_QTD_RETURN - COALESCE(br.BENCHMARK_QTD_RETURN, 0), 2) as ACTIVE_QTD_RETURN,
-            ROUND(pr.PORTFOLIO_YTD_RETURN - COALESCE(br.BENCHMARK_YTD_RETURN, 0), 2) as ACTIVE_YTD_RETURN,
+            ROUND(pr.PORTFOLIO_MTD_RETURN - COALESCE(br.BENCHMARK_MTD_RETURN, 0), 2)::NUMBER(9,2) as ACTIVE_MTD_RETURN,
+            ROUND(pr.PORTFOLIO_QTD_RETURN - COALESCE(br.BENCHMARK_QTD_RETURN, 0), 2)::NUMBER(9,2) as ACTIVE_QTD_RETURN,
+            ROUND(pr.PORTFOLIO_YTD_RETURN - COALESCE(br.BENCHMARK_YTD_RETURN, 0), 2)::NUMBER(9,2) as ACTIVE_YTD_RETURN,
             -- Portfolio metadata
             pr.HOLDING_COUNT,
-            ROUND(pr.PORTFOLIO_AUM, 2) as PORTFOLIO_AUM
+            ROUND(pr.PORTFOLIO_AUM, 2)::NUMBER(18,2) as PORTFOLIO_AUM
         FROM portfolio_returns pr
         LEFT JOIN benchmark_returns br 
             ON pr.BenchmarkID = br.BenchmarkID 
             AND pr.PerformanceDate = br.PerformanceDate
     """).collect()
     
-    log_detail("  Created V_PORTFOLIO_BENCHMARK_COMPARISON view")
+    # Keep the view name used by SAM_ANALYST_VIEW as a passthrough to the materialized table
+    session.sql(f"""
+        CREATE OR REPLACE VIEW {database_name}.CURATED.V_PORTFOLIO_BENCHMARK_COMPARISON AS
+        SELECT * FROM {database_name}.CURATED.FACT_PORTFOLIO_BENCHMARK_COMPARISON
+    """).collect()
+    
+    log_detail("  Created FACT_PORTFOLIO_BENCHMARK_COMPARISON table and V_PORTFOLIO_BENCHMARK_COMPARISON view")
 
 
 def build_tax_implications_data(session: Session):
@@ -2355,9 +2436,6 @@ def build_tax_implications_data(session: Session):
     st_rate = get_global_value('tax.short_term_rate', 0.37)
     tlh_threshold = get_global_value('tax.tax_loss_harvest_threshold_usd', -10000)
     
-    cost_basis_sql = f"UNIFORM({cost_basis_range[0]}, {cost_basis_range[1]}, RANDOM())"
-    holding_sql = f"UNIFORM({holding_range[0]}, {holding_range[1]}, RANDOM())"
-    
     session.sql(f"""
         CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_TAX_IMPLICATIONS AS
         WITH portfolio_holdings AS (
@@ -2367,166 +2445,219 @@ def build_tax_implications_data(session: Session):
                 h.MarketValue_Base,
                 h.PortfolioWeight
             FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR h
-            WHERE h.HoldingDate = (SELECT MAX(HoldingDate) FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR)
+            WHERE h.HoldingDate = ?
+        ),
+        -- Draw each random value once per holding so all derived columns agree
+        tax_base AS (
+            SELECT 
+                ph.PortfolioID,
+                ph.SecurityID,
+                ph.MarketValue_Base,
+                -- Cost basis (synthetic - based on current market value with multiplier from config)
+                ph.MarketValue_Base * UNIFORM({cost_basis_range[0]}, {cost_basis_range[1]}, RANDOM()) as COST_BASIS_USD,
+                -- Holding period (days from config)
+                UNIFORM({holding_range[0]}, {holding_range[1]}, RANDOM()) as HOLDING_PERIOD_DAYS
+            FROM portfolio_holdings ph
+        ),
+        -- Derive the gain/loss once; treatment, harvesting flag and rate reuse it
+        tax_calc AS (
+            SELECT 
+                tb.*,
+                tb.MarketValue_Base - tb.COST_BASIS_USD as UNREALIZED_GAIN_LOSS_USD,
+                tb.HOLDING_PERIOD_DAYS > {lt_threshold} as IS_LONG_TERM
+            FROM tax_base tb
         )
         SELECT 
-            ph.PortfolioID,
-            ph.SecurityID,
+            tc.PortfolioID,
+            tc.SecurityID,
             '{max_price_date}'::DATE as TAX_DATE,
-            -- Cost basis (synthetic - based on current market value with multiplier from config)
-            ph.MarketValue_Base * {cost_basis_sql} as COST_BASIS_USD,
+            tc.COST_BASIS_USD,
             -- Unrealized gain/loss
-            ph.MarketValue_Base - (ph.MarketValue_Base * {cost_basis_sql}) as UNREALIZED_GAIN_LOSS_USD,
-            -- Holding period (days from config)
-            {holding_sql} as HOLDING_PERIOD_DAYS,
+            tc.UNREALIZED_GAIN_LOSS_USD,
+            tc.HOLDING_PERIOD_DAYS,
             -- Tax treatment (based on threshold from config)
-            CASE 
-                WHEN {holding_sql} > {lt_threshold} THEN 'LONG_TERM'
-                ELSE 'SHORT_TERM'
-            END as TAX_TREATMENT,
+            IFF(tc.IS_LONG_TERM, 'LONG_TERM', 'SHORT_TERM') as TAX_TREATMENT,
             -- Tax loss harvesting opportunity (threshold from config)
-            CASE 
-                WHEN ph.MarketValue_Base - (ph.MarketValue_Base * {cost_basis_sql}) < {tlh_threshold} THEN TRUE
-                ELSE FALSE
-            END as TAX_LOSS_HARVEST_OPPORTUNITY,
+            COALESCE(tc.UNREALIZED_GAIN_LOSS_USD < {tlh_threshold}, FALSE) as TAX_LOSS_HARVEST_OPPORTUNITY,
             -- Capital gains tax rate (rates from config)
-            CASE 
-                WHEN {holding_sql} > {lt_threshold} THEN {lt_rate}
-                ELSE {st_rate}
-            END as TAX_RATE
-        FROM portfolio_holdings ph
-    """).collect()
+            IFF(tc.IS_LONG_TERM, {lt_rate}, {st_rate}) as TAX_RATE
+        FROM tax_calc tc
+    """, params=[get_max_holding_date(session)]).collect()
     
 
 # =============================================================================
 # MANDATE COMPLIANCE DATA (Scenario 3.2)
 # =============================================================================
 
-def build_fact_compliance_alerts(session: Session):
-    """
-    Create FACT_COMPLIANCE_ALERTS table for tracking mandate breaches and warnings.
-    Generates alerts for ESG downgrades, concentration breaches, and other compliance issues.
+def _fact_compliance_alerts_ddl(database_name: str) -> str:
+    """DDL for FACT_COMPLIANCE_ALERTS (submitted by build_compliance_tables)."""
+    # Note: No foreign key constraints - DIM_PORTFOLIO and DIM_SECURITY are created via DataFrames
+    # which don't define primary keys, so foreign key constraints would fail
+    return f"""
+    CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_COMPLIANCE_ALERTS (
+        AlertID BIGINT IDENTITY(1,1) PRIMARY KEY,
+        AlertDate DATE NOT NULL,
+        PortfolioID BIGINT NOT NULL,              -- FK to DIM_PORTFOLIO (not enforced)
+        SecurityID BIGINT NOT NULL,               -- FK to DIM_SECURITY (not enforced)
+        AlertType VARCHAR(50) NOT NULL,           -- 'ESG_DOWNGRADE', 'CONCENTRATION_BREACH', etc.
+        AlertSeverity VARCHAR(20) NOT NULL,       -- 'WARNING', 'BREACH'
+        OriginalValue VARCHAR(50),                -- e.g., 'A' (ESG grade before downgrade)
+        CurrentValue VARCHAR(50),                 -- e.g., 'BBB' (current ESG grade)
+        RequiresAction BOOLEAN NOT NULL,
+        ActionDeadline DATE,                      -- Deadline for remediation (typically 30 days)
+        AlertDescription TEXT,
+        ResolvedDate DATE,                        -- When alert was resolved (NULL if active)
+        ResolvedBy VARCHAR(100),                  -- PM who resolved
+        ResolutionNotes TEXT
+    )
     """
-    database_name = config.DATABASE['name']
-    
-    # Create the table
+
+
+def _fact_pre_screened_replacements_ddl(database_name: str) -> str:
+    """DDL for FACT_PRE_SCREENED_REPLACEMENTS (submitted by build_compliance_tables)."""
     # Note: No foreign key constraints - DIM_PORTFOLIO and DIM_SECURITY are created via DataFrames
     # which don't define primary keys, so foreign key constraints would fail
-    session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_COMPLIANCE_ALERTS (
-            AlertID BIGINT IDENTITY(1,1) PRIMARY KEY,
-            AlertDate DATE NOT NULL,
-            PortfolioID BIGINT NOT NULL,              -- FK to DIM_PORTFOLIO (not enforced)
-            SecurityID BIGINT NOT NULL,               -- FK to DIM_SECURITY (not enforced)
-            AlertType VARCHAR(50) NOT NULL,           -- 'ESG_DOWNGRADE', 'CONCENTRATION_BREACH', etc.
-            AlertSeverity VARCHAR(20) NOT NULL,       -- 'WARNING', 'BREACH'
-            OriginalValue VARCHAR(50),                -- e.g., 'A' (ESG grade before downgrade)
-            CurrentValue VARCHAR(50),                 -- e.g., 'BBB' (current ESG grade)
-            RequiresAction BOOLEAN NOT NULL,
-            ActionDeadline DATE,                      -- Deadline for remediation (typically 30 days)
-            AlertDescription TEXT,
-            ResolvedDate DATE,                        -- When alert was resolved (NULL if active)
-            ResolvedBy VARCHAR(100),                  -- PM who resolved
-            ResolutionNotes TEXT
-        )
-    """).collect()
-    
+    return f"""
+    CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_PRE_SCREENED_REPLACEMENTS (
+        ReplacementID BIGINT IDENTITY(1,1) PRIMARY KEY,
+        PortfolioID BIGINT NOT NULL,              -- Which portfolio/mandate (FK not enforced)
+        SecurityID BIGINT NOT NULL,               -- Candidate security (FK not enforced)
+        ScreenDate DATE NOT NULL,                 -- When pre-screened
+        IsEligible BOOLEAN NOT NULL,              -- Passes basic criteria
+        ReplacementRank INTEGER,                  -- Priority ranking (1=best, lower is better)
+        -- Key criteria for mandate compliance
+        ESG_Grade VARCHAR(10),                    -- Current ESG letter grade
+        AI_Growth_Score DECIMAL(18,4),            -- Proprietary AI/innovation score (0-100)
+        MarketCap_B_USD DECIMAL(18,4),            -- Market cap in billions
+        LiquidityScore INTEGER,                   -- Liquidity rating (1-10, 10=highest)
+        -- Audit trail
+        EligibilityReason TEXT,                   -- Why this candidate qualifies
+        ScreeningCriteria TEXT,                   -- Criteria applied during screening
+        LastUpdated TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+    )
+    """
+
 
-def build_fact_pre_screened_replacements(session: Session):
+def build_compliance_tables(session: Session):
     """
-    Create FACT_PRE_SCREENED_REPLACEMENTS table for pre-qualified replacement securities.
-    Maintains a universe of securities that meet mandate requirements for quick replacement.
+    Create FACT_COMPLIANCE_ALERTS and FACT_PRE_SCREENED_REPLACEMENTS in one round-trip
+    (both DDLs submitted as a single anonymous block).
     """
     database_name = config.DATABASE['name']
-    
-    # Create the table
-    # Note: No foreign key constraints - DIM_PORTFOLIO and DIM_SECURITY are created via DataFrames
-    # which don't define primary keys, so foreign key constraints would fail
     session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_PRE_SCREENED_REPLACEMENTS (
-            ReplacementID BIGINT IDENTITY(1,1) PRIMARY KEY,
-            PortfolioID BIGINT NOT NULL,              -- Which portfolio/mandate (FK not enforced)
-            SecurityID BIGINT NOT NULL,               -- Candidate security (FK not enforced)
-            ScreenDate DATE NOT NULL,                 -- When pre-screened
-            IsEligible BOOLEAN NOT NULL,              -- Passes basic criteria
-            ReplacementRank INTEGER,                  -- Priority ranking (1=best, lower is better)
-            -- Key criteria for mandate compliance
-            ESG_Grade VARCHAR(10),                    -- Current ESG letter grade
-            AI_Growth_Score DECIMAL(18,4),            -- Proprietary AI/innovation score (0-100)
-            MarketCap_B_USD DECIMAL(18,4),            -- Market cap in billions
-            LiquidityScore INTEGER,                   -- Liquidity rating (1-10, 10=highest)
-            -- Audit trail
-            EligibilityReason TEXT,                   -- Why this candidate qualifies
-            ScreeningCriteria TEXT,                   -- Criteria applied during screening
-            LastUpdated TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
-        )
+        EXECUTE IMMEDIATE $$
+        BEGIN
+            {_fact_compliance_alerts_ddl(database_name).strip()};
+            {_fact_pre_screened_replacements_ddl(database_name).strip()};
+        END;
+        $$
     """).collect()
-    
+
 
 # Note: Report templates are now generated via unstructured data hydration engine
 # following @unstructured-data-generation.mdc patterns. The template files are in
 # content_library/global/report_templates/ and processed by hydration_engine.py
 
+def _lookup_portfolio_and_securities(session: Session, portfolio_name: str, tickers: list):
+    """
+    Resolve a portfolio name and a set of tickers in one round-trip.
+    
+    Uses bind parameters so the statement text is stable across demo runs.
+    
+    Returns:
+        (portfolio_id, {ticker: security_id}); portfolio_id is None if the portfolio is missing
+    """
+    database_name = config.DATABASE['name']
+    ticker_binds = ", ".join("?" for _ in tickers) or "NULL"
+    result = session.sql(f"""
+        WITH p AS (
+            SELECT PortfolioID FROM {database_name}.CURATED.DIM_PORTFOLIO WHERE PortfolioName = ?
+        ),
+        s AS (
+            SELECT SecurityID, Ticker FROM {database_name}.CURATED.DIM_SECURITY WHERE Ticker IN ({ticker_binds})
+        )
+        SELECT p.PortfolioID, s.SecurityID, s.Ticker
+        FROM p LEFT JOIN s ON TRUE
+    """, params=[portfolio_name, *tickers]).collect()
+    
+    if not result:
+        return None, {}
+    security_map = {}
+    for row in result:
+        if row['TICKER'] is not None:
+            security_map.setdefault(row['TICKER'], row['SECURITYID'])
+    return result[0]['PORTFOLIOID'], security_map
+
+
+# Scenario 3.2 portfolio/ticker IDs shared by the demo generators: session id -> (portfolio_id, security_map)
+_DEMO_LOOKUPS = {}
+
+
+def _get_demo_lookups(session: Session):
+    """
+    Resolve the mandate-compliance demo portfolio and every ticker the demo generators
+    need (downgraded holding + replacements) once per session; later calls are dict hits.
+    """
+    key = id(session)
+    if key not in _DEMO_LOOKUPS:
+        scenario_config = config.SCENARIO_3_2_MANDATE_COMPLIANCE
+        tickers = [scenario_config['non_compliant_holding']['ticker']]
+        tickers += [r['ticker'] for r in scenario_config['pre_screened_replacements'] if r['ticker'] not in tickers]
+        _DEMO_LOOKUPS[key] = _lookup_portfolio_and_securities(session, scenario_config['portfolio'], tickers)
+    return _DEMO_LOOKUPS[key]
+
+
+def reset_demo_lookups():
+    """Reset cached demo portfolio/security IDs (call after rebuilding DIM_PORTFOLIO/DIM_SECURITY)."""
+    _DEMO_LOOKUPS.clear()
+
+
 def generate_demo_compliance_alert(session: Session):
     """
     Generate the demo compliance alert for META downgrade in SAM AI & Digital Innovation portfolio.
     Uses configuration from config.SCENARIO_3_2_MANDATE_COMPLIANCE.
     """
-    database_name = config.DATABASE['name']
     scenario_config = config.SCENARIO_3_2_MANDATE_COMPLIANCE
     non_compliant = scenario_config['non_compliant_holding']
     
-    # Get the portfolio ID
+    # Get the portfolio ID and the security ID for META (shared cached lookup)
     portfolio_name = scenario_config['portfolio']
-    portfolio_id_result = session.sql(f"""
-        SELECT PortfolioID 
-        FROM {database_name}.CURATED.DIM_PORTFOLIO 
-        WHERE PortfolioName = '{portfolio_name}'
-    """).collect()
+    portfolio_id, security_map = _get_demo_lookups(session)
     
-    if not portfolio_id_result:
+    if portfolio_id is None:
         log_warning(f"  Portfolio '{portfolio_name}' not found - skipping demo alert")
         return
     
-    portfolio_id = portfolio_id_result[0]['PORTFOLIOID']
-    
-    # Get the security ID for META (lookup by ticker)
-    security_id_result = session.sql(f"""
-        SELECT SecurityID 
-        FROM {database_name}.CURATED.DIM_SECURITY 
-        WHERE Ticker = '{non_compliant['ticker']}'
-        LIMIT 1
-    """).collect()
-    
-    if not security_id_result:
+    security_id = security_map.get(non_compliant['ticker'])
+    if not security_id:
         log_warning(f"  Security {non_compliant['ticker']} not found - skipping demo alert")
         return
     
-    security_id = security_id_result[0]['SECURITYID']
-    
     # Generate the alert
-    from datetime import datetime, timedelta
-    alert_date = datetime.now().date()
+    alert_date = get_build_date()
     action_deadline = alert_date + timedelta(days=non_compliant['action_deadline_days'])
     
+    # Single row: one bound INSERT (plan reused across runs, free text never spliced into SQL).
+    # FACT_COMPLIANCE_ALERTS is recreated by build_compliance_tables just before this runs
+    database_name = config.DATABASE['name']
     session.sql(f"""
         INSERT INTO {database_name}.CURATED.FACT_COMPLIANCE_ALERTS (
             AlertDate, PortfolioID, SecurityID, AlertType, AlertSeverity,
             OriginalValue, CurrentValue, RequiresAction, ActionDeadline, AlertDescription
         )
-        VALUES (
-            '{alert_date}',
-            {portfolio_id},
-            {security_id},
-            '{non_compliant['issue']}',
-            'BREACH',
-            '{non_compliant['original_esg_grade']}',
-            '{non_compliant['downgraded_esg_grade']}',
-            TRUE,
-            '{action_deadline}',
-            '{non_compliant['reason']}'
-        )
-    """).collect()
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, params=[
+        alert_date,
+        portfolio_id,
+        security_id,
+        non_compliant['issue'],
+        'BREACH',
+        non_compliant['original_esg_grade'],
+        non_compliant['downgraded_esg_grade'],
+        True,
+        action_deadline,
+        non_compliant['reason']
+    ]).collect()
     
 
 def generate_concentration_breach_alerts(session: Session):
@@ -2535,33 +2666,31 @@ def generate_concentration_breach_alerts(session: Session):
     against the 7.0% breach threshold and 6.5% warning threshold.
     Creates historical alerts for demo purposes (spread over last 30 days).
     
-    Uses batched writes for efficiency per performance-io.mdc.
+    Single INSERT ... SELECT: alert dates, severity and demo resolution status are
+    derived from the latest positions in-warehouse (no client round-trip).
     """
-    from datetime import datetime, timedelta
-    import snowflake_io_utils
     database_name = config.DATABASE['name']
     
-    # Ensure database context is set (required for temp stage creation in complex queries)
-    session.sql(f"USE DATABASE {database_name}").collect()
-    session.sql(f"USE SCHEMA {config.DATABASE['schemas']['curated']}").collect()
-    
-    # Clean up any stale Snowpark temp stages from previous failed runs
-    try:
-        stages = session.sql("SHOW STAGES LIKE 'SNOWPARK_TEMP_STAGE_%'").collect()
-        for stage in stages:
-            stage_name = stage['name']
-            session.sql(f"DROP STAGE IF EXISTS {stage_name}").collect()
-    except:
-        pass  # Ignore errors - stages may not exist
-    
     # Query positions that exceed concentration thresholds
     # Focus on SAM Technology & Infrastructure (per demo scenario)
     breach_threshold = config.COMPLIANCE_RULES['concentration']['max_single_issuer']  # 0.07 = 7%
     warning_threshold = config.COMPLIANCE_RULES['concentration']['warning_threshold']  # 0.065 = 6.5%
     
-    # Get positions exceeding warning threshold from latest holdings
-    concentration_issues = session.sql(f"""
-        WITH latest_holdings AS (
+    # PM names for resolved breaches (demo data)
+    pm_names = ['Anna Chen', 'David Martinez', 'Sarah Thompson', 'Michael Roberts']
+    pm_name_sql = f"GET({sql_array_construct(pm_names)}, MOD(AlertIdx, {len(pm_names)}))::VARCHAR"
+    
+    result = session.sql(f"""
+        INSERT INTO {database_name}.CURATED.FACT_COMPLIANCE_ALERTS (
+            AlertDate, PortfolioID, SecurityID, AlertType, AlertSeverity,
+            OriginalValue, CurrentValue, RequiresAction, ActionDeadline, AlertDescription,
+            ResolvedDate, ResolvedBy, ResolutionNotes
+        )
+        WITH thresholds AS (
+            SELECT ?::FLOAT as BreachThreshold, ?::FLOAT as WarningThreshold, ?::DATE as BuildDate
+        ),
+        -- Latest position per portfolio/security exceeding the warning threshold
+        latest_holdings AS (
             SELECT 
                 h.PortfolioID,
                 h.SecurityID,
@@ -2569,105 +2698,85 @@ def generate_concentration_breach_alerts(session: Session):
                 h.MarketValue_Base,
                 p.PortfolioName,
                 s.Ticker,
-                s.Description,
-                ROW_NUMBER() OVER (PARTITION BY h.PortfolioID, h.SecurityID ORDER BY h.HoldingDate DESC) as rn
+                s.Description
             FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR h
             JOIN {database_name}.CURATED.DIM_PORTFOLIO p ON h.PortfolioID = p.PortfolioID
             JOIN {database_name}.CURATED.DIM_SECURITY s ON h.SecurityID = s.SecurityID
-            WHERE h.PortfolioWeight >= {warning_threshold}
+            CROSS JOIN thresholds t
+            WHERE h.PortfolioWeight >= t.WarningThreshold
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY h.PortfolioID, h.SecurityID ORDER BY h.HoldingDate DESC) = 1
+        ),
+        -- Rank issues by weight (highest first) and classify severity
+        issues AS (
+            SELECT 
+                lh.*,
+                ROW_NUMBER() OVER (ORDER BY lh.PortfolioWeight DESC) - 1 as AlertIdx,
+                lh.PortfolioWeight >= t.BreachThreshold as IsBreach,
+                lh.PortfolioWeight * 100 as WeightPct,
+                IFF(lh.PortfolioWeight >= t.BreachThreshold, t.BreachThreshold, t.WarningThreshold) * 100 as ThresholdPct
+            FROM latest_holdings lh
+            CROSS JOIN thresholds t
+        ),
+        -- Spread alert dates across last 30 days (older alerts for higher concentrations)
+        -- and decide demo remediation status:
+        -- - Older WARNING alerts (>20 days old): resolved (position naturally decreased)
+        -- - Some older BREACH alerts (>25 days old, every other one): resolved (PM took action)
+        -- - Recent alerts: left unresolved to show active breaches
+        dated AS (
+            SELECT 
+                i.*,
+                DATEADD('day', -LEAST(28, 5 + AlertIdx * 3), t.BuildDate) as AlertDate,
+                NOT IsBreach AND LEAST(28, 5 + AlertIdx * 3) > 20 as WarningResolved,
+                IsBreach AND LEAST(28, 5 + AlertIdx * 3) > 25 AND MOD(AlertIdx, 2) = 0 as BreachResolved
+            FROM issues i
+            CROSS JOIN thresholds t
         )
         SELECT 
+            AlertDate,
             PortfolioID,
             SecurityID,
-            PortfolioWeight,
-            MarketValue_Base,
-            PortfolioName,
-            Ticker,
-            Description
-        FROM latest_holdings
-        WHERE rn = 1
-        ORDER BY PortfolioWeight DESC
-    """).collect()
-    
-    if not concentration_issues:
+            IFF(IsBreach, 'CONCENTRATION_BREACH', 'CONCENTRATION_WARNING') as AlertType,
+            IFF(IsBreach, 'BREACH', 'WARNING') as AlertSeverity,
+            TO_VARCHAR(ThresholdPct, 'FM990.0') || '%' as OriginalValue,
+            TO_VARCHAR(WeightPct, 'FM990.0') || '%' as CurrentValue,
+            IsBreach as RequiresAction,
+            IFF(IsBreach, DATEADD('day', 30, AlertDate), NULL) as ActionDeadline,
+            COALESCE(Ticker, '') || ' (' || COALESCE(Description, '') || ') position at ' || TO_VARCHAR(WeightPct, 'FM990.0') || '% '
+                || 'exceeds ' || TO_VARCHAR(ThresholdPct, 'FM990.0') || '% ' || LOWER(IFF(IsBreach, 'BREACH', 'WARNING'))
+                || ' threshold in ' || COALESCE(PortfolioName, '') || '. '
+                || 'Market value: $' || COALESCE(TO_VARCHAR(MarketValue_Base, 'FM9,999,999,999,999,990'), '') as AlertDescription,
+            CASE 
+                WHEN WarningResolved THEN DATEADD('day', 10, AlertDate)
+                WHEN BreachResolved THEN DATEADD('day', 15, AlertDate)
+            END as ResolvedDate,
+            IFF(WarningResolved OR BreachResolved, {pm_name_sql}, NULL) as ResolvedBy,
+            CASE 
+                WHEN WarningResolved THEN 'Position weight decreased to below warning threshold through market movement and natural rebalancing.'
+                WHEN BreachResolved THEN 'Position reduced to ' || TO_VARCHAR(ThresholdPct - 0.5, 'FM990.0')
+                    || '% per remediation plan. Executed via TWAP over 3 trading days to minimise market impact.'
+            END as ResolutionNotes
+        FROM dated
+        ORDER BY AlertIdx
+    """, params=[breach_threshold, warning_threshold, get_build_date()]).collect()
+    
+    inserted = result[0][0] if result else 0
+    if not inserted:
         log_detail("  No concentration issues found - skipping breach alerts")
         return
     
-    # Generate alerts with dates spread over last 30 days for demo realism
-    today = datetime.now().date()
-    rows = []
-    
-    # PM names for resolved breaches (demo data)
-    pm_names = ['Anna Chen', 'David Martinez', 'Sarah Thompson', 'Michael Roberts']
-    
-    for i, issue in enumerate(concentration_issues):
-        weight_pct = float(issue['PORTFOLIOWEIGHT']) * 100
-        is_breach = issue['PORTFOLIOWEIGHT'] >= breach_threshold
-        
-        # Spread alert dates across last 30 days (older alerts for higher concentrations)
-        days_ago = min(28, 5 + i * 3)  # First alerts 5-28 days ago
-        alert_date = today - timedelta(days=days_ago)
-        action_deadline = alert_date + timedelta(days=30)
-        
-        severity = 'BREACH' if is_breach else 'WARNING'
-        threshold_pct = breach_threshold * 100 if is_breach else warning_threshold * 100
-        
-        description = (
-            f"{issue['TICKER']} ({issue['DESCRIPTION']}) position at {weight_pct:.1f}% "
-            f"exceeds {threshold_pct:.1f}% {severity.lower()} threshold in {issue['PORTFOLIONAME']}. "
-            f"Market value: ${issue['MARKETVALUE_BASE']:,.0f}"
-        )
-        
-        # Determine remediation status for demo purposes:
-        # - Older WARNING alerts (>20 days old): mark as resolved
-        # - Some older BREACH alerts (>25 days old, every other one): mark as resolved
-        # - Recent alerts: leave unresolved to show active breaches
-        resolved_date = None
-        resolved_by = None
-        resolution_notes = None
-        
-        if not is_breach and days_ago > 20:
-            # Older warnings - mark as resolved (position naturally decreased)
-            resolved_date = alert_date + timedelta(days=10)
-            resolved_by = pm_names[i % len(pm_names)]
-            resolution_notes = f"Position weight decreased to below warning threshold through market movement and natural rebalancing."
-        elif is_breach and days_ago > 25 and i % 2 == 0:
-            # Some older breaches - mark as resolved (PM took action)
-            resolved_date = alert_date + timedelta(days=15)
-            resolved_by = pm_names[i % len(pm_names)]
-            resolution_notes = f"Position reduced to {threshold_pct - 0.5:.1f}% per remediation plan. Executed via TWAP over 3 trading days to minimise market impact."
-        
-        rows.append({
-            'AlertDate': alert_date,
-            'PortfolioID': issue['PORTFOLIOID'],
-            'SecurityID': issue['SECURITYID'],
-            'AlertType': 'CONCENTRATION_BREACH' if is_breach else 'CONCENTRATION_WARNING',
-            'AlertSeverity': severity,
-            'OriginalValue': f"{threshold_pct:.1f}%",
-            'CurrentValue': f"{weight_pct:.1f}%",
-            'RequiresAction': is_breach,
-            'ActionDeadline': action_deadline if is_breach else None,
-            'AlertDescription': description,
-            'ResolvedDate': resolved_date,
-            'ResolvedBy': resolved_by,
-            'ResolutionNotes': resolution_notes
-        })
-    
-    # Batch insert all alerts using write_pandas
-    if rows:
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        df.columns = [col.upper() for col in df.columns]
-        session.write_pandas(
-            df, 'FACT_COMPLIANCE_ALERTS',
-            database=database_name, schema='CURATED',
-            quote_identifiers=False, overwrite=False, auto_create_table=False
-        )
-        breach_count = sum(1 for r in rows if r['AlertSeverity'] == 'BREACH')
-        warning_count = sum(1 for r in rows if r['AlertSeverity'] == 'WARNING')
-        resolved_count = sum(1 for r in rows if r['ResolvedDate'] is not None)
-        active_count = len(rows) - resolved_count
-        log_detail(f"  Generated {len(rows)} concentration alerts ({breach_count} breaches, {warning_count} warnings, {resolved_count} resolved, {active_count} active)")
+    counts = session.sql(f"""
+        SELECT 
+            COUNT_IF(AlertSeverity = 'BREACH') as breach_count,
+            COUNT_IF(AlertSeverity = 'WARNING') as warning_count,
+            COUNT_IF(ResolvedDate IS NOT NULL) as resolved_count
+        FROM {database_name}.CURATED.FACT_COMPLIANCE_ALERTS
+        WHERE AlertType IN ('CONCENTRATION_BREACH', 'CONCENTRATION_WARNING')
+    """).collect()[0]
+    breach_count = counts['BREACH_COUNT']
+    warning_count = counts['WARNING_COUNT']
+    resolved_count = counts['RESOLVED_COUNT']
+    active_count = inserted - resolved_count
+    log_detail(f"  Generated {inserted} concentration alerts ({breach_count} breaches, {warning_count} warnings, {resolved_count} resolved, {active_count} active)")
 
 
 def generate_demo_pre_screened_replacements(session: Session):
@@ -2680,35 +2789,17 @@ def generate_demo_pre_screened_replacements(session: Session):
     database_name = config.DATABASE['name']
     scenario_config = config.SCENARIO_3_2_MANDATE_COMPLIANCE
     
-    # Get the portfolio ID
+    # Get the portfolio ID and all SecurityIDs for configured replacements (shared cached lookup)
     portfolio_name = scenario_config['portfolio']
-    portfolio_id_result = session.sql(f"""
-        SELECT PortfolioID 
-        FROM {database_name}.CURATED.DIM_PORTFOLIO 
-        WHERE PortfolioName = '{portfolio_name}'
-    """).collect()
+    replacements = scenario_config['pre_screened_replacements']
+    portfolio_id, security_map = _get_demo_lookups(session)
     
-    if not portfolio_id_result:
+    if portfolio_id is None:
         log_warning(f"  Portfolio '{portfolio_name}' not found - skipping pre-screened replacements")
         return
     
-    portfolio_id = portfolio_id_result[0]['PORTFOLIOID']
-    
-    # Batch fetch all SecurityIDs for configured replacements in ONE query
-    replacements = scenario_config['pre_screened_replacements']
-    tickers = [r['ticker'] for r in replacements]
-    ticker_list = ", ".join(f"'{t}'" for t in tickers)
-    
-    sec_rows = session.sql(f"""
-        SELECT SecurityID, Ticker
-        FROM {database_name}.CURATED.DIM_SECURITY
-        WHERE Ticker IN ({ticker_list})
-    """).collect()
-    security_map = {row['TICKER']: row['SECURITYID'] for row in sec_rows}
-    
     # Build all replacement rows locally
-    from datetime import datetime
-    screen_date = datetime.now().date()
+    screen_date = get_build_date()
     screening_criteria = (
         f"AI Growth Score >= {scenario_config['mandate_requirements']['ai_growth_threshold']}, "
         f"ESG Grade >= {scenario_config['mandate_requirements']['min_esg_grade']}, "
@@ -2739,19 +2830,17 @@ def generate_demo_pre_screened_replacements(session: Session):
             'ScreeningCriteria': screening_criteria,
         })
     
-    # Write all rows in a single batch
+    # Write all rows in a single bound multi-row INSERT into the table created by
+    # build_compliance_tables (keeps ReplacementID IDENTITY and LastUpdated default;
+    # no temp stage, Parquet upload or COPY for a handful of rows)
     if rows:
-        import pandas as pd
-        from snowflake_io_utils import cleanup_temp_stages
-        cleanup_temp_stages(session)
-        df = pd.DataFrame(rows)
-        df.columns = [col.upper() for col in df.columns]
-        session.write_pandas(
-            df, 'FACT_PRE_SCREENED_REPLACEMENTS',
-            database=database_name, schema='CURATED',
-            quote_identifiers=False, overwrite=True, auto_create_table=True
-        )
-        
+        columns = list(rows[0].keys())
+        row_binds = "(" + ", ".join("?" for _ in columns) + ")"
+        session.sql(f"""
+            INSERT INTO {database_name}.CURATED.FACT_PRE_SCREENED_REPLACEMENTS ({", ".join(columns)})
+            VALUES {", ".join(row_binds for _ in rows)}
+        """, params=[row[col] for row in rows for col in columns]).collect()
+
 
 # Report template functions removed - now handled by unstructured data hydration engine
 # Templates are in content_library/global/report_templates/ following @unstructured-data-generation.mdc patterns
@@ -2763,12 +2852,10 @@ def generate_demo_pre_screened_replacements(session: Session):
 def build_dim_counterparty(session: Session):
     """Build counterparty dimension with settlement characteristics.
     
-    Uses batched write_pandas for efficiency (no row-by-row inserts).
+    Single CTAS from VALUES (no row-by-row inserts, no stage upload).
     Explicit CounterpartyID 1..20 preserves downstream assumptions in FACT_TRADE_SETTLEMENT.
     """
-    import snowflake_io_utils
     database_name = config.DATABASE['name']
-    random.seed(config.RNG_SEED)
     
     # Define realistic counterparties with settlement profiles
     # Build as list of dicts with explicit IDs (1..N) for downstream consistency
@@ -2795,17 +2882,21 @@ def build_dim_counterparty(session: Session):
         {'CounterpartyID': 20, 'CounterpartyName': 'Market Maker A', 'CounterpartyType': 'Broker', 'HistoricalFailRate': 0.02, 'AverageSettlementTime': 2.0, 'RiskRating': 'BBB'},
     ]
     
-    # Write using native write_pandas
-    import pandas as pd
-    from snowflake_io_utils import cleanup_temp_stages
-    cleanup_temp_stages(session)
-    df = pd.DataFrame(counterparties)
-    df.columns = [col.upper() for col in df.columns]
-    session.write_pandas(
-        df, 'DIM_COUNTERPARTY',
-        database=database_name, schema='CURATED',
-        quote_identifiers=False, overwrite=True, auto_create_table=True
-    )
+    # Single typed CTAS from VALUES (no write_pandas stage upload/COPY, no schema inference)
+    columns = list(counterparties[0].keys())
+    session.sql(f"""
+        CREATE OR REPLACE TABLE {database_name}.CURATED.DIM_COUNTERPARTY (
+            CounterpartyID INT,
+            CounterpartyName VARCHAR(100),
+            CounterpartyType VARCHAR(20),
+            HistoricalFailRate FLOAT,
+            AverageSettlementTime FLOAT,
+            RiskRating VARCHAR(10)
+        ) AS
+        SELECT * FROM (VALUES
+            {sql_values_rows(counterparties, columns)}
+        ) AS t({", ".join(columns)})
+    """).collect()
 
 
 def build_dim_custodian(session: Session):
@@ -2827,35 +2918,84 @@ def build_dim_custodian(session: Session):
         {'CustodianID': 8, 'CustodianName': 'BNP Paribas Securities Services', 'CustodianType': 'Regional Custodian', 'CoverageRegions': 'EMEA', 'ServiceLevel': 'Standard'},
     ]
     
-    # Write using native write_pandas
-    import pandas as pd
-    from snowflake_io_utils import cleanup_temp_stages
-    cleanup_temp_stages(session)
-    df = pd.DataFrame(custodians)
-    df.columns = [col.upper() for col in df.columns]
-    session.write_pandas(
-        df, 'DIM_CUSTODIAN',
-        database=database_name, schema='CURATED',
-        quote_identifiers=False, overwrite=True, auto_create_table=True
-    )
+    # Single typed CTAS from VALUES (no write_pandas stage upload/COPY, no schema inference)
+    columns = list(custodians[0].keys())
+    session.sql(f"""
+        CREATE OR REPLACE TABLE {database_name}.CURATED.DIM_CUSTODIAN (
+            CustodianID INT,
+            CustodianName VARCHAR(100),
+            CustodianType VARCHAR(50),
+            CoverageRegions VARCHAR(100),
+            ServiceLevel VARCHAR(20)
+        ) AS
+        SELECT * FROM (VALUES
+            {sql_values_rows(custodians, columns)}
+        ) AS t({", ".join(columns)})
+    """).collect()
+
+
+def build_shared_recent_context(session: Session):
+    """Materialize the recent-window inputs shared by the middle office fact builders.
+    
+    Creates two session-scoped temporary tables in CURATED:
+    - _RECENT_DATES: weekdays in the last 10 days relative to max_price_date
+    - _LATEST_POSITIONS: positions on the latest HoldingDate, with portfolio TotalAssets
+    
+    FACT_POSITION_DAILY_ABOR is scanned once here instead of once per builder.
+    Must be called AFTER FACT_POSITION_DAILY_ABOR has been built; drop the tables
+    with drop_shared_recent_context() once the middle office builders finish.
+    """
+    database_name = config.DATABASE['name']
+    max_price_date = get_max_price_date(session)
+    
+    session.sql(f"""
+        CREATE OR REPLACE TEMPORARY TABLE {database_name}.CURATED._RECENT_DATES AS
+        SELECT recent_date
+        FROM (
+            SELECT DATEADD(day, -seq4(), '{max_price_date}'::DATE) as recent_date
+            FROM TABLE(GENERATOR(rowcount => 10))
+        )
+        WHERE DAYOFWEEK(recent_date) BETWEEN 2 AND 6
+    """).collect()
+    
+    session.sql(f"""
+        CREATE OR REPLACE TEMPORARY TABLE {database_name}.CURATED._LATEST_POSITIONS AS
+        SELECT 
+            PortfolioID,
+            SecurityID,
+            MarketValue_Base,
+            SUM(MarketValue_Base) OVER (PARTITION BY PortfolioID) as TotalAssets
+        FROM (
+            SELECT PortfolioID, SecurityID, MarketValue_Base
+            FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
+            WHERE HoldingDate = ?
+        )
+    """, params=[get_max_holding_date(session)]).collect()
+
+
+def drop_shared_recent_context(session: Session):
+    """Drop the temporary tables created by build_shared_recent_context()."""
+    database_name = config.DATABASE['name']
+    for table_name in ('_RECENT_DATES', '_LATEST_POSITIONS'):
+        session.sql(f"DROP TABLE IF EXISTS {database_name}.CURATED.{table_name}").collect()
 
 
 def build_fact_trade_settlement(session: Session, test_mode: bool = False):
     """Build trade settlement fact table with status tracking.
     
     Uses default settlement days from DATA_MODEL['synthetic_distributions']['country_groups']['_default']['settlement_days'].
-    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios.
+    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios,
+    read from the tables materialized by build_shared_recent_context().
     """
     database_name = config.DATABASE['name']
-    random.seed(config.RNG_SEED)
-    
-    # Get max_price_date for recent window generation
-    max_price_date = get_max_price_date(session)
     
     # Get default settlement days from config
     from config_accessors import get_country_value
     default_settlement_days = get_country_value('US', 'settlement_days') or 2
     
+    # SettlementID comes from a sequence (no global sort over the unioned rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_TRADE_SETTLEMENT").collect()
+    
     # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
     # Includes both historical settlements and recent window settlements for demo
     session.sql(f"""
@@ -2869,13 +3009,16 @@ def build_fact_trade_settlement(session: Session, test_mode: bool = False):
                 t.SecurityID,
                 ABS(t.GrossAmount_Local) as SettlementValue,
                 t.Currency,
-                -- Assign counterparty and custodian with some randomness
-                MOD(ABS(HASH(t.TransactionID)), 20) + 1 as CounterpartyID,
-                MOD(ABS(HASH(t.TransactionID * 2)), 8) + 1 as CustodianID,
+                -- Assign counterparty and custodian from independent digits of one hash
+                MOD(t.h, 20) + 1 as CounterpartyID,
+                MOD(FLOOR(t.h / 20), 8) + 1 as CustodianID,
                 -- Generate failure flag (2-5% failure rate)
                 UNIFORM(0, 100, RANDOM()) as failure_chance
-            FROM {database_name}.CURATED.FACT_TRANSACTION t
-            WHERE t.TransactionType IN ('BUY', 'SELL')
+            FROM (
+                SELECT *, ABS(HASH(TransactionID)) as h
+                FROM {database_name}.CURATED.FACT_TRANSACTION
+                WHERE TransactionType IN ('BUY', 'SELL')
+            ) t
         ),
         historical_settlements AS (
             SELECT 
@@ -2907,42 +3050,45 @@ def build_fact_trade_settlement(session: Session, test_mode: bool = False):
         ),
         -- Recent window: Generate settlements for last 10 days relative to max_price_date
         -- This ensures demo queries for "today" or "past N days" find data
-        recent_dates AS (
-            SELECT DATEADD(day, -seq4(), '{max_price_date}'::DATE) as recent_date
-            FROM TABLE(GENERATOR(rowcount => 10))
-            WHERE DAYOFWEEK(DATEADD(day, -seq4(), '{max_price_date}'::DATE)) BETWEEN 2 AND 6
-        ),
         recent_securities AS (
-            SELECT DISTINCT SecurityID, PortfolioID
-            FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
-            WHERE HoldingDate = (SELECT MAX(HoldingDate) FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR)
+            SELECT SecurityID, PortfolioID
+            FROM {database_name}.CURATED._LATEST_POSITIONS
+            GROUP BY SecurityID, PortfolioID
         ),
         recent_window_settlements AS (
             SELECT 
-                -1 * (ROW_NUMBER() OVER (ORDER BY rd.recent_date, rs.SecurityID)) as TradeID,
-                DATEADD(day, -{default_settlement_days}, rd.recent_date) as TradeDate,
-                rd.recent_date as SettlementDate,
+                -1 * (ROW_NUMBER() OVER (ORDER BY w.recent_date, w.SecurityID)) as TradeID,
+                DATEADD(day, -{default_settlement_days}, w.recent_date) as TradeDate,
+                w.recent_date as SettlementDate,
                 -- Higher failure/pending rate for demo visibility (15% failed, 10% pending)
                 CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 15 THEN 'Failed'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 25 THEN 'Pending'
+                    WHEN w.r_status <= 15 THEN 'Failed'
+                    WHEN w.r_status <= 25 THEN 'Pending'
                     ELSE 'Settled'
                 END as Status,
-                rs.PortfolioID,
-                rs.SecurityID,
-                MOD(ABS(HASH(rs.SecurityID + DATEDIFF(day, '2020-01-01', rd.recent_date))), 20) + 1 as CounterpartyID,
-                MOD(ABS(HASH(rs.SecurityID * 2)), 8) + 1 as CustodianID,
+                w.PortfolioID,
+                w.SecurityID,
+                MOD(ABS(HASH(w.SecurityID + DATEDIFF(day, '2020-01-01', w.recent_date))), 20) + 1 as CounterpartyID,
+                MOD(ABS(HASH(w.SecurityID * 2)), 8) + 1 as CustodianID,
                 UNIFORM(50000, 500000, RANDOM()) as SettlementValue,
                 'USD' as Currency,
                 CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 5 THEN 'SSI mismatch'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 10 THEN 'Insufficient shares'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 15 THEN 'Counterparty system issue'
+                    WHEN w.r_reason <= 5 THEN 'SSI mismatch'
+                    WHEN w.r_reason <= 10 THEN 'Insufficient shares'
+                    WHEN w.r_reason <= 15 THEN 'Counterparty system issue'
                     ELSE NULL
                 END as FailureReason,
                 NULL as ResolvedDate
-            FROM recent_dates rd
-            CROSS JOIN (SELECT * FROM recent_securities ORDER BY RANDOM() LIMIT 5) rs
+            -- One status draw and one (independent) failure-reason draw per settlement
+            FROM (
+                SELECT 
+                    rd.recent_date,
+                    rs.*,
+                    UNIFORM(0, 100, RANDOM()) as r_status,
+                    UNIFORM(0, 100, RANDOM()) as r_reason
+                FROM {database_name}.CURATED._RECENT_DATES rd
+                CROSS JOIN (SELECT SecurityID, PortfolioID FROM recent_securities SAMPLE (5 ROWS)) rs
+            ) w
         ),
         all_settlements AS (
             SELECT * FROM historical_settlements
@@ -2950,7 +3096,7 @@ def build_fact_trade_settlement(session: Session, test_mode: bool = False):
             SELECT * FROM recent_window_settlements
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY SettlementDate, TradeID) as SettlementID,
+            {database_name}.CURATED.SEQ_FACT_TRADE_SETTLEMENT.NEXTVAL as SettlementID,
             TradeID,
             TradeDate,
             SettlementDate,
@@ -2970,29 +3116,32 @@ def build_fact_trade_settlement(session: Session, test_mode: bool = False):
 def build_fact_reconciliation(session: Session, test_mode: bool = False):
     """Build reconciliation fact table tracking breaks and resolutions.
     
-    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios.
+    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios,
+    read from the tables materialized by build_shared_recent_context().
     """
     database_name = config.DATABASE['name']
-    random.seed(config.RNG_SEED)
     
-    # Get max_price_date for recent window generation
-    max_price_date = get_max_price_date(session)
+    # ReconciliationID comes from a sequence (no global sort over the unioned rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_RECONCILIATION").collect()
     
     # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
     # Includes both historical breaks and recent window breaks for demo
     session.sql(f"""
         CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_RECONCILIATION AS
+        -- Keep only break candidates (1-2% break rate) before any per-break expressions run
         WITH position_data AS (
-            SELECT 
-                p.HoldingDate,
-                p.PortfolioID,
-                p.SecurityID,
-                p.MarketValue_Base,
-                p.Quantity,
-                -- Generate break flag (1-2% break rate)
-                UNIFORM(0, 100, RANDOM()) as break_chance,
-                UNIFORM(0, 3, RANDOM()) as break_type_flag
-            FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR p
+            SELECT *
+            FROM (
+                SELECT 
+                    p.HoldingDate,
+                    p.PortfolioID,
+                    p.SecurityID,
+                    p.MarketValue_Base,
+                    UNIFORM(0, 100, RANDOM()) as break_chance,
+                    UNIFORM(0, 3, RANDOM()) as break_type_flag
+                FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR p
+            )
+            WHERE break_chance <= 2
         ),
         historical_breaks AS (
             SELECT 
@@ -3022,46 +3171,41 @@ def build_fact_reconciliation(session: Session, test_mode: bool = False):
                     ELSE NULL
                 END as ResolutionNotes
             FROM position_data
-            WHERE break_chance <= 2
         ),
         -- Recent window: Generate daily reconciliation breaks for last 10 days relative to max_price_date
         -- This ensures demo queries for "today's breaks" find data
-        recent_dates AS (
-            SELECT DATEADD(day, -seq4(), '{max_price_date}'::DATE) as recent_date
-            FROM TABLE(GENERATOR(rowcount => 10))
-            WHERE DAYOFWEEK(DATEADD(day, -seq4(), '{max_price_date}'::DATE)) BETWEEN 2 AND 6
-        ),
-        recent_portfolios AS (
-            SELECT DISTINCT PortfolioID FROM {database_name}.CURATED.DIM_PORTFOLIO
-        ),
         recent_securities AS (
-            SELECT DISTINCT SecurityID, PortfolioID, MarketValue_Base
-            FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
-            WHERE HoldingDate = (SELECT MAX(HoldingDate) FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR)
+            SELECT SecurityID, PortfolioID, MarketValue_Base
+            FROM {database_name}.CURATED._LATEST_POSITIONS
+            GROUP BY SecurityID, PortfolioID, MarketValue_Base
         ),
         recent_window_breaks AS (
             SELECT 
-                rd.recent_date as ReconciliationDate,
-                rs.PortfolioID,
-                rs.SecurityID,
+                w.recent_date as ReconciliationDate,
+                w.PortfolioID,
+                w.SecurityID,
                 -- Distribute break types evenly
                 CASE 
-                    WHEN MOD(ABS(HASH(rs.SecurityID + DATEDIFF(day, '2020-01-01', rd.recent_date))), 3) = 0 THEN 'Position'
-                    WHEN MOD(ABS(HASH(rs.SecurityID + DATEDIFF(day, '2020-01-01', rd.recent_date))), 3) = 1 THEN 'Cash'
+                    WHEN MOD(ABS(HASH(w.SecurityID + DATEDIFF(day, '2020-01-01', w.recent_date))), 3) = 0 THEN 'Position'
+                    WHEN MOD(ABS(HASH(w.SecurityID + DATEDIFF(day, '2020-01-01', w.recent_date))), 3) = 1 THEN 'Cash'
                     ELSE 'Price'
                 END as BreakType,
-                rs.MarketValue_Base as InternalValue,
-                rs.MarketValue_Base * (1 + UNIFORM(-0.03, 0.03, RANDOM())) as CustodianValue,
+                w.MarketValue_Base as InternalValue,
+                w.MarketValue_Base * (1 + UNIFORM(-0.03, 0.03, RANDOM())) as CustodianValue,
                 -- Mix of statuses for demo: 40% Open, 35% Investigating, 25% Resolved
                 CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 40 THEN 'Open'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 75 THEN 'Investigating'
+                    WHEN w.r_status <= 40 THEN 'Open'
+                    WHEN w.r_status <= 75 THEN 'Investigating'
                     ELSE 'Resolved'
                 END as Status,
                 NULL as ResolutionDate,
                 NULL as ResolutionNotes
-            FROM recent_dates rd
-            CROSS JOIN (SELECT * FROM recent_securities ORDER BY RANDOM() LIMIT 3) rs
+            -- One status draw per break
+            FROM (
+                SELECT rd.recent_date, rs.*, UNIFORM(0, 100, RANDOM()) as r_status
+                FROM {database_name}.CURATED._RECENT_DATES rd
+                CROSS JOIN (SELECT SecurityID, PortfolioID, MarketValue_Base FROM recent_securities SAMPLE (3 ROWS)) rs
+            ) w
         ),
         all_breaks AS (
             SELECT ReconciliationDate, PortfolioID, SecurityID, BreakType, InternalValue, CustodianValue, Status, ResolutionDate, ResolutionNotes
@@ -3071,7 +3215,7 @@ def build_fact_reconciliation(session: Session, test_mode: bool = False):
             FROM recent_window_breaks
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY ReconciliationDate, PortfolioID, SecurityID) as ReconciliationID,
+            {database_name}.CURATED.SEQ_FACT_RECONCILIATION.NEXTVAL as ReconciliationID,
             ReconciliationDate,
             PortfolioID,
             SecurityID,
@@ -3087,144 +3231,168 @@ def build_fact_reconciliation(session: Session, test_mode: bool = False):
 
 
 def build_fact_nav_calculation(session: Session, test_mode: bool = False):
-    """Build NAV calculation fact table.
+    """Build NAV calculation and NAV component fact tables in one pass.
     
-    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios.
+    FACT_NAV_CALCULATION and FACT_NAV_COMPONENTS are filled by a single INSERT ALL,
+    so FACT_POSITION_DAILY_ABOR is scanned once for both the per-portfolio totals
+    and the per-security components.
+    
+    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios,
+    read from the tables materialized by build_shared_recent_context().
     """
     database_name = config.DATABASE['name']
-    random.seed(config.RNG_SEED)
     
-    # Get max_price_date for recent window generation
-    max_price_date = get_max_price_date(session)
+    # NAVID and ComponentID come from sequences (no global sort over the unioned rows).
+    # Both tables are created empty so one multi-table insert can populate them.
+    # Note: No foreign key constraints (see FACT_COMPLIANCE_ALERTS)
+    session.sql(f"""
+        EXECUTE IMMEDIATE $$
+        BEGIN
+            CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_NAV_CALCULATION;
+            CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_NAV_COMPONENTS;
+            CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_NAV_CALCULATION (
+                NAVID BIGINT,
+                CalculationDate DATE,
+                PortfolioID BIGINT,
+                NAVperShare NUMBER(18,6),
+                TotalAssets NUMBER(38,2),
+                TotalLiabilities NUMBER(38,2),
+                NetAssets NUMBER(38,2),
+                SharesOutstanding NUMBER(18,2),
+                CalculationStatus VARCHAR(50),
+                AnomaliesDetected VARCHAR(200),
+                ApprovalStatus VARCHAR(20),
+                ApprovedBy VARCHAR(100),
+                ApprovalTimestamp TIMESTAMP_NTZ
+            );
+            CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_NAV_COMPONENTS (
+                ComponentID BIGINT,
+                NAVID BIGINT,                  -- FK to FACT_NAV_CALCULATION (not enforced)
+                ComponentType VARCHAR(50),
+                ComponentValue NUMBER(38,2),
+                SecurityID BIGINT,
+                Quantity NUMBER(38,0),
+                Price NUMBER(18,4),
+                AccrualAmount NUMBER(38,2)
+            );
+        END;
+        $$
+    """).collect()
     
-    # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
-    # Includes both historical NAV calculations and recent window for demo
+    # Each NAV row is joined to its positions once: the first row per NAVID feeds
+    # FACT_NAV_CALCULATION, every matched position feeds FACT_NAV_COMPONENTS.
+    # Recent-window NAV rows only get components on dates that have positions.
     session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_NAV_CALCULATION AS
-        WITH daily_positions AS (
-            SELECT 
-                HoldingDate,
-                PortfolioID,
-                SUM(MarketValue_Base) as TotalAssets
-            FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
-            GROUP BY HoldingDate, PortfolioID
-        ),
-        historical_nav AS (
-            SELECT 
-                HoldingDate as CalculationDate,
-                PortfolioID,
-                TotalAssets,
-                TotalAssets * 0.001 as TotalLiabilities,
-                TotalAssets * 0.999 as NetAssets,
-                100000000.00 as SharesOutstanding,
-                (TotalAssets * 0.999) / 100000000.00 as NAVperShare,
-                CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 1 THEN 'Pending Review'
-                    ELSE 'Calculated'
-                END as CalculationStatus,
-                CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 0.5 THEN 'NAV change >2% from prior day'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 1 THEN 'Missing prices detected'
-                    ELSE NULL
-                END as AnomaliesDetected,
-                CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 1 THEN 'Pending'
-                    ELSE 'Approved'
-                END as ApprovalStatus,
-                CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) > 1 THEN 'Operations Manager'
-                    ELSE NULL
-                END as ApprovedBy,
-                CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) > 1 THEN DATEADD(hour, 2, HoldingDate)
-                    ELSE NULL
-                END as ApprovalTimestamp
-            FROM daily_positions
-        ),
-        -- Recent window: Generate daily NAV calculations for last 10 days relative to max_price_date
-        -- This ensures demo queries for "today's NAV" find data
-        recent_dates AS (
-            SELECT DATEADD(day, -seq4(), '{max_price_date}'::DATE) as recent_date
-            FROM TABLE(GENERATOR(rowcount => 10))
-            WHERE DAYOFWEEK(DATEADD(day, -seq4(), '{max_price_date}'::DATE)) BETWEEN 2 AND 6
-        ),
-        latest_portfolio_values AS (
-            SELECT PortfolioID, TotalAssets
-            FROM (
-                SELECT PortfolioID, SUM(MarketValue_Base) as TotalAssets
+        INSERT ALL
+            WHEN ComponentRank = 1 THEN
+                INTO {database_name}.CURATED.FACT_NAV_CALCULATION (NAVID, CalculationDate, PortfolioID, NAVperShare, TotalAssets, TotalLiabilities, NetAssets, SharesOutstanding, CalculationStatus, AnomaliesDetected, ApprovalStatus, ApprovedBy, ApprovalTimestamp)
+                VALUES (NAVID, CalculationDate, PortfolioID, NAVperShare, TotalAssets, TotalLiabilities, NetAssets, SharesOutstanding, CalculationStatus, AnomaliesDetected, ApprovalStatus, ApprovedBy, ApprovalTimestamp)
+            WHEN SecurityID IS NOT NULL THEN
+                INTO {database_name}.CURATED.FACT_NAV_COMPONENTS (ComponentID, NAVID, ComponentType, ComponentValue, SecurityID, Quantity, Price, AccrualAmount)
+                VALUES (ComponentID, NAVID, ComponentType, MarketValue_Base, SecurityID, Quantity, Price, NULL)
+        SELECT * FROM (
+            WITH positions AS (
+                SELECT HoldingDate, PortfolioID, SecurityID, Quantity, MarketValue_Base
                 FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
-                WHERE HoldingDate = (SELECT MAX(HoldingDate) FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR)
-                GROUP BY PortfolioID
+            ),
+            daily_positions AS (
+                SELECT 
+                    HoldingDate,
+                    PortfolioID,
+                    SUM(MarketValue_Base) as TotalAssets
+                FROM positions
+                GROUP BY HoldingDate, PortfolioID
+            ),
+            historical_nav AS (
+                SELECT 
+                    HoldingDate as CalculationDate,
+                    PortfolioID,
+                    TotalAssets,
+                    TotalAssets * 0.001 as TotalLiabilities,
+                    TotalAssets * 0.999 as NetAssets,
+                    100000000.00 as SharesOutstanding,
+                    (TotalAssets * 0.999) / 100000000.00 as NAVperShare,
+                    CASE 
+                        WHEN r <= 1 THEN 'Pending Review'
+                        ELSE 'Calculated'
+                    END as CalculationStatus,
+                    CASE 
+                        WHEN r <= 0.5 THEN 'NAV change >2% from prior day'
+                        WHEN r <= 1 THEN 'Missing prices detected'
+                        ELSE NULL
+                    END as AnomaliesDetected,
+                    CASE 
+                        WHEN r <= 1 THEN 'Pending'
+                        ELSE 'Approved'
+                    END as ApprovalStatus,
+                    CASE 
+                        WHEN r > 1 THEN 'Operations Manager'
+                        ELSE NULL
+                    END as ApprovedBy,
+                    CASE 
+                        WHEN r > 1 THEN DATEADD(hour, 2, HoldingDate)
+                        ELSE NULL
+                    END as ApprovalTimestamp
+                -- One draw per NAV row: review, anomaly and approval flags move together
+                FROM (SELECT *, UNIFORM(0, 100, RANDOM()) as r FROM daily_positions)
+            ),
+            -- Recent window: Generate daily NAV calculations for last 10 days relative to max_price_date
+            -- This ensures demo queries for "today's NAV" find data
+            latest_portfolio_values AS (
+                SELECT PortfolioID, TotalAssets
+                FROM {database_name}.CURATED._LATEST_POSITIONS
+                GROUP BY PortfolioID, TotalAssets
+            ),
+            recent_window_nav AS (
+                SELECT 
+                    rd.recent_date as CalculationDate,
+                    lpv.PortfolioID,
+                    -- Add small daily variation to assets (-0.5% to +0.5%)
+                    lpv.TotalAssets * (1 + UNIFORM(-0.005, 0.005, RANDOM())) as TotalAssets,
+                    lpv.TotalAssets * 0.001 as TotalLiabilities,
+                    lpv.TotalAssets * 0.999 as NetAssets,
+                    100000000.00 as SharesOutstanding,
+                    (lpv.TotalAssets * 0.999) / 100000000.00 as NAVperShare,
+                    -- Most recent NAVs are calculated and approved
+                    'Calculated' as CalculationStatus,
+                    -- Small chance of anomaly for demo interest (5%)
+                    CASE 
+                        WHEN UNIFORM(0, 100, RANDOM()) <= 5 THEN 'Zero NAV Movement Anomaly'
+                        ELSE NULL
+                    END as AnomaliesDetected,
+                    'Approved' as ApprovalStatus,
+                    'Operations Manager' as ApprovedBy,
+                    DATEADD(hour, 18, rd.recent_date) as ApprovalTimestamp
+                FROM {database_name}.CURATED._RECENT_DATES rd
+                CROSS JOIN latest_portfolio_values lpv
+            ),
+            all_nav AS (
+                SELECT CalculationDate, PortfolioID, TotalAssets, TotalLiabilities, NetAssets, SharesOutstanding, NAVperShare, CalculationStatus, AnomaliesDetected, ApprovalStatus, ApprovedBy, ApprovalTimestamp
+                FROM historical_nav
+                UNION ALL
+                SELECT CalculationDate, PortfolioID, TotalAssets, TotalLiabilities, NetAssets, SharesOutstanding, NAVperShare, CalculationStatus, AnomaliesDetected, ApprovalStatus, ApprovedBy, ApprovalTimestamp
+                FROM recent_window_nav
+            ),
+            numbered_nav AS (
+                SELECT {database_name}.CURATED.SEQ_FACT_NAV_CALCULATION.NEXTVAL as NAVID, *
+                FROM all_nav
             )
-        ),
-        recent_window_nav AS (
             SELECT 
-                rd.recent_date as CalculationDate,
-                lpv.PortfolioID,
-                -- Add small daily variation to assets (-0.5% to +0.5%)
-                lpv.TotalAssets * (1 + UNIFORM(-0.005, 0.005, RANDOM())) as TotalAssets,
-                lpv.TotalAssets * 0.001 as TotalLiabilities,
-                lpv.TotalAssets * 0.999 as NetAssets,
-                100000000.00 as SharesOutstanding,
-                (lpv.TotalAssets * 0.999) / 100000000.00 as NAVperShare,
-                -- Most recent NAVs are calculated and approved
-                'Calculated' as CalculationStatus,
-                -- Small chance of anomaly for demo interest (5%)
-                CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 5 THEN 'Zero NAV Movement Anomaly'
-                    ELSE NULL
-                END as AnomaliesDetected,
-                'Approved' as ApprovalStatus,
-                'Operations Manager' as ApprovedBy,
-                DATEADD(hour, 18, rd.recent_date) as ApprovalTimestamp
-            FROM recent_dates rd
-            CROSS JOIN latest_portfolio_values lpv
-        ),
-        all_nav AS (
-            SELECT CalculationDate, PortfolioID, TotalAssets, TotalLiabilities, NetAssets, SharesOutstanding, NAVperShare, CalculationStatus, AnomaliesDetected, ApprovalStatus, ApprovedBy, ApprovalTimestamp
-            FROM historical_nav
-            UNION ALL
-            SELECT CalculationDate, PortfolioID, TotalAssets, TotalLiabilities, NetAssets, SharesOutstanding, NAVperShare, CalculationStatus, AnomaliesDetected, ApprovalStatus, ApprovedBy, ApprovalTimestamp
-            FROM recent_window_nav
+                n.*,
+                p.SecurityID,
+                p.Quantity,
+                p.MarketValue_Base,
+                -- INSERT ALL VALUES only accepts source columns, so component
+                -- literals and derived values are projected here
+                'Securities' as ComponentType,
+                p.MarketValue_Base / NULLIF(p.Quantity, 0) as Price,
+                {database_name}.CURATED.SEQ_FACT_NAV_COMPONENTS.NEXTVAL as ComponentID,
+                ROW_NUMBER() OVER (PARTITION BY n.NAVID ORDER BY p.SecurityID) as ComponentRank
+            FROM numbered_nav n
+            LEFT JOIN positions p
+                ON n.CalculationDate = p.HoldingDate
+                AND n.PortfolioID = p.PortfolioID
         )
-        SELECT 
-            ROW_NUMBER() OVER (ORDER BY CalculationDate, PortfolioID) as NAVID,
-            CalculationDate,
-            PortfolioID,
-            NAVperShare,
-            TotalAssets,
-            TotalLiabilities,
-            NetAssets,
-            SharesOutstanding,
-            CalculationStatus,
-            AnomaliesDetected,
-            ApprovalStatus,
-            ApprovedBy,
-            ApprovalTimestamp
-        FROM all_nav
-    """).collect()
-
-
-def build_fact_nav_components(session: Session, test_mode: bool = False):
-    """Build NAV component detail table."""
-    database_name = config.DATABASE['name']
-    
-    # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
-    session.sql(f"""
-        CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_NAV_COMPONENTS AS
-        SELECT 
-            ROW_NUMBER() OVER (ORDER BY n.NAVID, p.SecurityID) as ComponentID,
-            n.NAVID,
-            'Securities' as ComponentType,
-            p.MarketValue_Base as ComponentValue,
-            p.SecurityID,
-            p.Quantity,
-            p.MarketValue_Base / NULLIF(p.Quantity, 0) as Price,
-            NULL as AccrualAmount
-        FROM {database_name}.CURATED.FACT_NAV_CALCULATION n
-        JOIN {database_name}.CURATED.FACT_POSITION_DAILY_ABOR p
-            ON n.CalculationDate = p.HoldingDate
-            AND n.PortfolioID = p.PortfolioID
     """).collect()
 
 
@@ -3240,7 +3408,9 @@ def build_fact_corporate_actions(session: Session, test_mode: bool = False):
     Includes pending corporate actions with ExDates in forward window from max_price_date for demo.
     """
     database_name = config.DATABASE['name']
-    random.seed(config.RNG_SEED)
+    
+    # ActionID comes from a sequence (no global sort over the unioned rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_CORPORATE_ACTIONS").collect()
     
     # Get max_price_date for forward window generation
     max_price_date = get_max_price_date(session)
@@ -3265,20 +3435,22 @@ def build_fact_corporate_actions(session: Session, test_mode: bool = False):
     # Includes both historical actions and forward window pending actions for demo
     session.sql(f"""
         CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_CORPORATE_ACTIONS AS
-        WITH top_securities AS (
+        -- 100 largest securities by total market value (ranked in the aggregate, then joined)
+        WITH top100 AS (
+            SELECT SecurityID
+            FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
+            GROUP BY SecurityID
+            QUALIFY ROW_NUMBER() OVER (ORDER BY SUM(MarketValue_Base) DESC) <= 100
+        ),
+        top_securities AS (
             SELECT DISTINCT
                 p.SecurityID,
                 s.IssuerID,
                 p.HoldingDate,
                 ROW_NUMBER() OVER (PARTITION BY p.SecurityID ORDER BY p.HoldingDate) as day_num
             FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR p
+            JOIN top100 t ON p.SecurityID = t.SecurityID
             JOIN {database_name}.CURATED.DIM_SECURITY s ON p.SecurityID = s.SecurityID
-            WHERE p.SecurityID IN (
-                SELECT TOP 100 SecurityID 
-                FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR
-                GROUP BY SecurityID
-                ORDER BY SUM(MarketValue_Base) DESC
-            )
         ),
         action_dates AS (
             SELECT 
@@ -3286,36 +3458,41 @@ def build_fact_corporate_actions(session: Session, test_mode: bool = False):
                 IssuerID,
                 HoldingDate as AnnouncementDate,
                 day_num,
-                UNIFORM(0, 3, RANDOM()) as action_type_flag
-            FROM top_securities
-            WHERE MOD(day_num, {event_freq}) = 0
-        ),
-        historical_actions AS (
-            SELECT 
-                SecurityID,
-                IssuerID,
+                -- Classify once and draw the dividend once so details and impact value agree
                 CASE 
                     WHEN action_type_flag < {dividend_threshold} THEN 'Dividend'
                     WHEN action_type_flag < {split_threshold} THEN 'Split'
                     ELSE 'Merger'
                 END as ActionType,
+                {dividend_sql} as dividend_amt
+            FROM (
+                SELECT *, UNIFORM(0, 3, RANDOM()) as action_type_flag
+                FROM top_securities
+                WHERE MOD(day_num, {event_freq}) = 0
+            )
+        ),
+        historical_actions AS (
+            SELECT 
+                SecurityID,
+                IssuerID,
+                ActionType,
                 AnnouncementDate,
                 DATEADD(day, {ex_offset}, AnnouncementDate) as ExDate,
                 DATEADD(day, {record_offset}, AnnouncementDate) as RecordDate,
                 DATEADD(day, {payment_offset}, AnnouncementDate) as PaymentDate,
-                CASE 
-                    WHEN action_type_flag < {dividend_threshold} THEN 'Quarterly dividend: $' || ROUND({dividend_sql}, 2) || ' per share'
-                    WHEN action_type_flag < {split_threshold} THEN '2-for-1 stock split'
+                CASE ActionType
+                    WHEN 'Dividend' THEN 'Quarterly dividend: $' || ROUND(dividend_amt, 2) || ' per share'
+                    WHEN 'Split' THEN '2-for-1 stock split'
                     ELSE 'Acquisition announcement'
                 END as ActionDetails,
-                CASE 
-                    WHEN action_type_flag < {dividend_threshold} THEN {dividend_sql}
-                    WHEN action_type_flag < {split_threshold} THEN 2.0
+                CASE ActionType
+                    WHEN 'Dividend' THEN dividend_amt
+                    WHEN 'Split' THEN 2.0
                     ELSE 0.0
                 END as ImpactValue,
-                CASE 
-                    WHEN action_type_flag < {dividend_threshold} THEN 'Processed'
-                    WHEN action_type_flag < {split_threshold} THEN 'Pending'
+                CASE ActionType
+                    WHEN 'Dividend' THEN 'Processed'
+                    WHEN 'Split' THEN 'Pending'
                     ELSE 'Announced'
                 END as ProcessingStatus,
                 UNIFORM(1, 10, RANDOM()) as PortfoliosAffected
@@ -3324,9 +3501,12 @@ def build_fact_corporate_actions(session: Session, test_mode: bool = False):
         -- Forward window: Generate pending corporate actions with ExDates in next 10 days from max_price_date
         -- This ensures demo queries for "pending corporate actions in next 5 days" find data
         forward_dates AS (
-            SELECT DATEADD(day, seq4() + 1, '{max_price_date}'::DATE) as future_date
-            FROM TABLE(GENERATOR(rowcount => 10))
-            WHERE DAYOFWEEK(DATEADD(day, seq4() + 1, '{max_price_date}'::DATE)) BETWEEN 2 AND 6
+            SELECT future_date
+            FROM (
+                SELECT DATEADD(day, seq4() + 1, '{max_price_date}'::DATE) as future_date
+                FROM TABLE(GENERATOR(rowcount => 10))
+            )
+            WHERE DAYOFWEEK(future_date) BETWEEN 2 AND 6
         ),
         forward_securities AS (
             SELECT DISTINCT s.SecurityID, s.IssuerID
@@ -3335,38 +3515,40 @@ def build_fact_corporate_actions(session: Session, test_mode: bool = False):
                 SELECT 1 FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR p
                 WHERE p.SecurityID = s.SecurityID
             )
-            ORDER BY RANDOM()
-            LIMIT 15
         ),
         forward_actions AS (
             SELECT 
-                fs.SecurityID,
-                fs.IssuerID,
+                w.SecurityID,
+                w.IssuerID,
                 -- Mix of action types: 70% dividends, 20% splits, 10% mergers for demo
                 CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 70 THEN 'Dividend'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 90 THEN 'Split'
+                    WHEN w.r_action <= 70 THEN 'Dividend'
+                    WHEN w.r_action <= 90 THEN 'Split'
                     ELSE 'Merger'
                 END as ActionType,
-                DATEADD(day, -5, fd.future_date) as AnnouncementDate,
-                fd.future_date as ExDate,
-                DATEADD(day, 1, fd.future_date) as RecordDate,
-                DATEADD(day, 15, fd.future_date) as PaymentDate,
+                DATEADD(day, -5, w.future_date) as AnnouncementDate,
+                w.future_date as ExDate,
+                DATEADD(day, 1, w.future_date) as RecordDate,
+                DATEADD(day, 15, w.future_date) as PaymentDate,
                 CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 70 THEN 'Quarterly dividend: $' || ROUND({dividend_sql}, 2) || ' per share'
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 90 THEN '2-for-1 stock split'
+                    WHEN w.r_action <= 70 THEN 'Quarterly dividend: $' || ROUND(w.dividend_amt, 2) || ' per share'
+                    WHEN w.r_action <= 90 THEN '2-for-1 stock split'
                     ELSE 'Acquisition announcement - pending regulatory approval'
                 END as ActionDetails,
                 CASE 
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 70 THEN {dividend_sql}
-                    WHEN UNIFORM(0, 100, RANDOM()) <= 90 THEN 2.0
+                    WHEN w.r_action <= 70 THEN w.dividend_amt
+                    WHEN w.r_action <= 90 THEN 2.0
                     ELSE 0.0
                 END as ImpactValue,
                 -- All forward actions are pending for demo
                 'Pending' as ProcessingStatus,
                 UNIFORM(3, 8, RANDOM()) as PortfoliosAffected
-            FROM forward_dates fd
-            CROSS JOIN (SELECT * FROM forward_securities ORDER BY RANDOM() LIMIT 3) fs
+            -- One draw per action so type, details and impact value agree (dividend drawn once too)
+            FROM (
+                SELECT fd.future_date, fs.*, UNIFORM(0, 100, RANDOM()) as r_action, {dividend_sql} as dividend_amt
+                FROM forward_dates fd
+                CROSS JOIN (SELECT SecurityID, IssuerID FROM forward_securities SAMPLE (3 ROWS)) fs
+            ) w
         ),
         all_actions AS (
             SELECT SecurityID, IssuerID, ActionType, AnnouncementDate, ExDate, RecordDate, PaymentDate, ActionDetails, ImpactValue, ProcessingStatus, PortfoliosAffected
@@ -3376,7 +3558,7 @@ def build_fact_corporate_actions(session: Session, test_mode: bool = False):
             FROM forward_actions
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY AnnouncementDate, SecurityID) as ActionID,
+            {database_name}.CURATED.SEQ_FACT_CORPORATE_ACTIONS.NEXTVAL as ActionID,
             SecurityID,
             IssuerID,
             ActionType,
@@ -3396,8 +3578,15 @@ def build_fact_corporate_action_impact(session: Session, test_mode: bool = False
     """Build corporate action impact on portfolios."""
     database_name = config.DATABASE['name']
     
+    # ImpactID comes from a sequence (no global sort over the joined rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_CORPORATE_ACTION_IMPACT").collect()
+    
     # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
-    # Join on the closest holding date on or before the record date
+    # Join on the closest holding date on or before the record date. Positions are
+    # gap-free month-end snapshots up to the latest HoldingDate, so that date is never
+    # before the previous month-end, or the latest snapshot for forward actions whose
+    # record date lies past it; bounding the range keeps the join from fanning out
+    # over all history.
     session.sql(f"""
         CREATE OR REPLACE TABLE {database_name}.CURATED.FACT_CORPORATE_ACTION_IMPACT AS
         WITH latest_positions AS (
@@ -3411,22 +3600,26 @@ def build_fact_corporate_action_impact(session: Session, test_mode: bool = False
                 ca.RecordDate,
                 p.PortfolioID,
                 p.Quantity,
-                p.HoldingDate,
-                ROW_NUMBER() OVER (
-                    PARTITION BY ca.ActionID, p.PortfolioID 
-                    ORDER BY p.HoldingDate DESC
-                ) as rn
+                p.HoldingDate
             FROM {database_name}.CURATED.FACT_CORPORATE_ACTIONS ca
             JOIN {database_name}.CURATED.FACT_POSITION_DAILY_ABOR p
                 ON ca.SecurityID = p.SecurityID
                 AND p.HoldingDate <= ca.RecordDate
+                AND p.HoldingDate >= LEAST(
+                    LAST_DAY(DATEADD(month, -1, ca.RecordDate)),
+                    (SELECT MAX(HoldingDate) FROM {database_name}.CURATED.FACT_POSITION_DAILY_ABOR)
+                )
             WHERE ca.ActionType IN ('Dividend', 'Split')
+            -- Positions are unique per (PortfolioID, SecurityID, HoldingDate), so a
+            -- partition MAX picks the same row as ROW_NUMBER() = 1 without sorting
+            QUALIFY p.HoldingDate = MAX(p.HoldingDate) OVER (PARTITION BY ca.ActionID, p.PortfolioID)
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY ActionID, PortfolioID) as ImpactID,
+            {database_name}.CURATED.SEQ_FACT_CORPORATE_ACTION_IMPACT.NEXTVAL as ImpactID,
             ActionID,
             PortfolioID,
             SecurityID,
+            ActionType,
             Quantity as PositionBefore,
             CASE 
                 WHEN ActionType = 'Split' THEN Quantity * ImpactValue
@@ -3443,14 +3636,15 @@ def build_fact_corporate_action_impact(session: Session, test_mode: bool = False
                 ELSE 'Pending'
             END as ValidationStatus
         FROM latest_positions
-        WHERE rn = 1
     """).collect()
 
 
 def build_fact_cash_movements(session: Session, test_mode: bool = False):
     """Build cash movement fact table."""
     database_name = config.DATABASE['name']
-    random.seed(config.RNG_SEED)
+    
+    # CashMovementID comes from a sequence (no global sort over the unioned rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_CASH_MOVEMENTS").collect()
     
     # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
     session.sql(f"""
@@ -3472,20 +3666,19 @@ def build_fact_cash_movements(session: Session, test_mode: bool = False):
         
         UNION ALL
         
-        -- Dividend cash flows
+        -- Dividend cash flows (ProcessedDate is the action's PaymentDate)
         SELECT 
-            ca.PaymentDate as MovementDate,
+            cai.ProcessedDate as MovementDate,
             cai.PortfolioID,
             'Dividend' as MovementType,
             cai.CashImpact as Amount,
             'USD' as Currency,
             NULL as CounterpartyID,
-            'Corp Action #' || ca.ActionID as Reference,
+            'Corp Action #' || cai.ActionID as Reference,
             'Received' as Status,
-            ca.PaymentDate as ValueDate
+            cai.ProcessedDate as ValueDate
         FROM {database_name}.CURATED.FACT_CORPORATE_ACTION_IMPACT cai
-        JOIN {database_name}.CURATED.FACT_CORPORATE_ACTIONS ca ON cai.ActionID = ca.ActionID
-        WHERE ca.ActionType = 'Dividend'
+        WHERE cai.ActionType = 'Dividend'
         
         UNION ALL
         
@@ -3504,7 +3697,7 @@ def build_fact_cash_movements(session: Session, test_mode: bool = False):
         WHERE DAY(n.CalculationDate) = 1  -- Monthly fees
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY MovementDate, PortfolioID) as CashMovementID,
+            {database_name}.CURATED.SEQ_FACT_CASH_MOVEMENTS.NEXTVAL as CashMovementID,
             MovementDate,
             PortfolioID,
             MovementType,
@@ -3521,12 +3714,13 @@ def build_fact_cash_movements(session: Session, test_mode: bool = False):
 def build_fact_cash_positions(session: Session, test_mode: bool = False):
     """Build daily cash position snapshots.
     
-    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios.
+    Includes recent window data (last 10 days relative to max_price_date) for demo scenarios,
+    read from the tables materialized by build_shared_recent_context().
     """
     database_name = config.DATABASE['name']
     
-    # Get max_price_date for recent window generation
-    max_price_date = get_max_price_date(session)
+    # CashPositionID comes from a sequence (no global sort over the unioned rows)
+    session.sql(f"CREATE OR REPLACE SEQUENCE {database_name}.CURATED.SEQ_FACT_CASH_POSITIONS").collect()
     
     # Create table using CREATE TABLE AS SELECT pattern (no foreign keys)
     # Includes both historical positions and recent window for demo
@@ -3549,29 +3743,31 @@ def build_fact_cash_positions(session: Session, test_mode: bool = False):
                 PortfolioID,
                 CustodianID,
                 Currency,
-                LAG(Inflows - Outflows, 1, 10000000) OVER (PARTITION BY PortfolioID ORDER BY MovementDate) as OpeningBalance,
+                -- Opening balance carries forward: $10M seed plus all prior days' net flows
+                10000000 + COALESCE(SUM(Inflows - Outflows) OVER (
+                    PARTITION BY PortfolioID, Currency ORDER BY MovementDate
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ), 0) as OpeningBalance,
                 Inflows,
                 Outflows,
                 0 as FXGainLoss,
-                Inflows - Outflows as NetChange,
                 'Reconciled' as ReconciliationStatus
             FROM daily_flows
         ),
         -- Recent window: Generate daily cash positions for last 10 days relative to max_price_date
         -- This ensures demo queries for "current cash position" find data
-        recent_dates AS (
-            SELECT DATEADD(day, -seq4(), '{max_price_date}'::DATE) as recent_date
-            FROM TABLE(GENERATOR(rowcount => 10))
-            WHERE DAYOFWEEK(DATEADD(day, -seq4(), '{max_price_date}'::DATE)) BETWEEN 2 AND 6
-        ),
+        -- CustodianID is derived once per portfolio rather than per (portfolio, date)
         portfolios AS (
-            SELECT DISTINCT PortfolioID FROM {database_name}.CURATED.DIM_PORTFOLIO
+            SELECT 
+                PortfolioID,
+                MOD(ABS(HASH(PortfolioID)), 8) + 1 as CustodianID
+            FROM {database_name}.CURATED.DIM_PORTFOLIO
         ),
         recent_window_cash AS (
             SELECT 
                 rd.recent_date as PositionDate,
                 p.PortfolioID,
-                MOD(ABS(HASH(p.PortfolioID)), 8) + 1 as CustodianID,
+                p.CustodianID,
                 'USD' as Currency,
                 -- Base opening balance around $5-15M per portfolio
                 UNIFORM(5000000, 15000000, RANDOM()) as OpeningBalance,
@@ -3580,9 +3776,8 @@ def build_fact_cash_positions(session: Session, test_mode: bool = False):
                 -- Daily outflows $80K - $400K  
                 UNIFORM(80000, 400000, RANDOM()) as Outflows,
                 UNIFORM(-10000, 10000, RANDOM()) as FXGainLoss,
-                0 as NetChange,
                 'Reconciled' as ReconciliationStatus
-            FROM recent_dates rd
+            FROM {database_name}.CURATED._RECENT_DATES rd
             CROSS JOIN portfolios p
         ),
         all_cash AS (
@@ -3593,7 +3788,7 @@ def build_fact_cash_positions(session: Session, test_mode: bool = False):
             FROM recent_window_cash
         )
         SELECT 
-            ROW_NUMBER() OVER (ORDER BY PositionDate, PortfolioID) as CashPositionID,
+            {database_name}.CURATED.SEQ_FACT_CASH_POSITIONS.NEXTVAL as CashPositionID,
             PositionDate,
             PortfolioID,
             CustodianID,
@@ -3608,19 +3803,27 @@ def build_fact_cash_positions(session: Session, test_mode: bool = False):
     """).collect()
 
 
+def build_compliance_alert_data(session: Session):
+    """
+    Populate FACT_COMPLIANCE_ALERTS: the demo alert first, then concentration breaches,
+    so the demo alert keeps the first AlertID.
+    """
+    _run_build_step(generate_demo_compliance_alert, session)
+    _run_build_step(generate_concentration_breach_alerts, session)
+
+
 def build_scenario_data(session: Session, scenario: str):
     """Build scenario-specific data."""
     
     if scenario == 'mandate_compliance' or scenario == 'portfolio_copilot':
         pass
         
-        # Create tables
-        _run_build_step(build_fact_compliance_alerts, session)
-        _run_build_step(build_fact_pre_screened_replacements, session)
+        # Create tables (both DDLs in one submission)
+        _run_build_step(build_compliance_tables, session)
         
-        # Generate demo data
-        _run_build_step(generate_demo_compliance_alert, session)
-        _run_build_step(generate_concentration_breach_alerts, session)
+        # Generate demo data (portfolio/security IDs resolved once and shared across the generators)
+        reset_demo_lookups()
+        _run_build_step(build_compliance_alert_data, session)
         _run_build_step(generate_demo_pre_screened_replacements, session)
         
         # Note: Report templates are generated via unstructured data hydration engine
@@ -3634,33 +3837,35 @@ def validate_data_quality(session: Session):
     """Validate data quality of the new model."""
     
     
-    # Check portfolio weights sum to 100%
-    weight_check = session.sql(f"""
-        SELECT 
-            PortfolioID,
-            SUM(PortfolioWeight) as TotalWeight,
-            ABS(SUM(PortfolioWeight) - 1.0) as WeightDeviation
-        FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR 
-        WHERE HoldingDate = (SELECT MAX(HoldingDate) FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR)
-        GROUP BY PortfolioID
-        HAVING ABS(SUM(PortfolioWeight) - 1.0) > 0.001
-    """).collect()
-    
-    if weight_check:
-        log_warning(f"  Portfolio weight deviations found: {len(weight_check)} portfolios")
-    else:
-        pass
-    
-    # Check security identifier integrity (simplified - check ticker column)
-    security_check = session.sql(f"""
+    # Portfolio weights sum to 100% and security identifier integrity
+    # (simplified - check ticker column), fetched in one round trip
+    quality_check = session.sql(f"""
+        WITH weight_deviations AS (
+            SELECT PortfolioID
+            FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR 
+            WHERE HoldingDate = ?
+            GROUP BY PortfolioID
+            HAVING ABS(SUM(PortfolioWeight) - 1.0) > 0.001
+        ),
+        security_stats AS (
+            SELECT 
+                COUNT(*) as total_securities,
+                COUNT(CASE WHEN Ticker IS NOT NULL AND LENGTH(Ticker) > 0 THEN 1 END) as securities_with_ticker
+            FROM {config.DATABASE['name']}.CURATED.DIM_SECURITY
+        )
         SELECT 
-            COUNT(*) as total_securities,
-            COUNT(CASE WHEN Ticker IS NOT NULL AND LENGTH(Ticker) > 0 THEN 1 END) as securities_with_ticker
-        FROM {config.DATABASE['name']}.CURATED.DIM_SECURITY
-    """).collect()
-    
-    if security_check:
-        result = security_check[0]
+            (SELECT COUNT(*) FROM weight_deviations) as weight_deviations,
+            s.total_securities,
+            s.securities_with_ticker
+        FROM security_stats s
+    """, params=[get_max_holding_date(session)]).collect()
+    
+    if quality_check:
+        result = quality_check[0]
+        
+        if result['WEIGHT_DEVIATIONS']:
+            log_warning(f"  Portfolio weight deviations found: {result['WEIGHT_DEVIATIONS']} portfolios")
+        
         total = result['TOTAL_SECURITIES']
         with_ticker = result['SECURITIES_WITH_TICKER']
         
@@ -33,6 +33,7 @@ from typing import List
 import config
 import hydration_engine
 from logging_utils import log_warning, log_error, log_success
+from db_helpers import use_schema
 
 def build_all(session: Session, document_types: List[str], test_mode: bool = False):
     """
@@ -50,8 +51,7 @@ def build_all(session: Session, document_types: List[str], test_mode: bool = Fal
     
     # Ensure database context is set
     try:
-        session.sql(f"USE DATABASE {config.DATABASE['name']}").collect()
-        session.sql(f"USE SCHEMA {config.DATABASE['schemas']['raw']}").collect()
+        use_schema(session, config.DATABASE['schemas']['raw'])
     except Exception as e:
         log_warning(f" Could not set database context: {e}")
     
@@ -91,8 +91,8 @@ def create_corpus_tables(session: Session, document_types: List[str]):
         if doc_config.get('source') == 'real':
             continue
         
-        raw_table = f"{config.DATABASE['name']}.RAW.{config.DOCUMENT_TYPES[doc_type]['table_name']}"
-        corpus_table = f"{config.DATABASE['name']}.CURATED.{config.DOCUMENT_TYPES[doc_type]['corpus_name']}"
+        raw_table = f"{config.DATABASE['name']}.RAW.{doc_config['table_name']}"
+        corpus_table = f"{config.DATABASE['name']}.CURATED.{doc_config['corpus_name']}"
         linkage_level = doc_config.get('linkage_level', 'global')
         
         # Build column list based on document type and linkage level
@@ -33,7 +33,10 @@ import os
 import re
 import yaml
 import random
+import bisect
 import hashlib
+from functools import lru_cache
+from itertools import accumulate
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta, date
 from snowflake.snowpark import Session
@@ -41,7 +44,7 @@ import config
 import rules_loader
 from logging_utils import log_warning
 from demo_helpers import get_demo_company_priority_sql
-from db_helpers import get_max_price_date
+from db_helpers import get_max_price_date, get_max_holding_date
 
 # Module-level anchor date for consistent date generation across all documents
 # Set by hydrate_documents() to max_price_date from stock prices
@@ -51,10 +54,18 @@ _anchor_date: Optional[date] = None
 # MODULE: Content Loader
 # ============================================================================
 
+# Use the libyaml C loader when PyYAML was built with it (same SafeLoader semantics)
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@lru_cache(maxsize=None)
 def load_templates(doc_type: str) -> List[Dict[str, Any]]:
     """
     Scan content library and load all templates for specified document type.
     
+    Cached per doc_type: templates are static for the life of the process.
+    Callers must treat the returned list and template dicts as read-only.
+    
     Args:
         doc_type: Document type identifier (e.g., 'broker_research')
     
@@ -77,6 +88,8 @@ def load_templates(doc_type: str) -> List[Dict[str, Any]]:
     
     # Recursively find all .md files in template directory
     for root, dirs, files in os.walk(template_path):
+        # Prune partials directories so their files are never opened here
+        dirs[:] = [d for d in dirs if d != '_partials']
         for file in files:
             if file.endswith('.md') and not file.startswith('_'):
                 file_path = os.path.join(root, file)
@@ -116,7 +129,7 @@ def load_single_template(file_path: str) -> Optional[Dict[str, Any]]:
             return None
         
         # Parse YAML metadata
-        metadata = yaml.safe_load(parts[1])
+        metadata = yaml.load(parts[1], Loader=_YAML_LOADER)
         
         if metadata is None:
             return None
@@ -167,13 +180,32 @@ def load_sub_template(partial_name: str, base_template_path: str) -> str:
 # MODULE: Variant Picker
 # ============================================================================
 
-def select_template(templates: List[Dict[str, Any]], context: Dict[str, Any]) -> Dict[str, Any]:
+def build_sector_index(templates: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """
+    Map each sector tag to the positions of the templates carrying it.
+    
+    Args:
+        templates: List of available templates
+    
+    Returns:
+        Dict of sector tag -> template positions, in template order
+    """
+    index: Dict[str, List[int]] = {}
+    for position, template in enumerate(templates):
+        for tag in dict.fromkeys(template['metadata'].get('sector_tags', []) or []):
+            index.setdefault(tag, []).append(position)
+    return index
+
+def select_template(templates: List[Dict[str, Any]], context: Dict[str, Any],
+                    sector_index: Optional[Dict[str, List[int]]] = None) -> Dict[str, Any]:
     """
     Deterministically select template variant based on entity and context.
     
     Args:
         templates: List of available templates
         context: Entity context with SecurityID, sector, etc.
+        sector_index: Optional build_sector_index() result for templates,
+            built once per doc type by the caller
     
     Returns:
         Selected template dict
@@ -217,25 +249,32 @@ def select_template(templates: List[Dict[str, Any]], context: Dict[str, Any]) ->
     gics_sector = map_sic_to_gics(entity_sector)
     
     # Filter templates matching entity sector (check both SIC description and mapped GICS sector)
-    sector_matched = [
-        t for t in templates 
-        if any([
-            entity_sector in t['metadata'].get('sector_tags', []),
-            gics_sector in t['metadata'].get('sector_tags', [])
-        ])
-    ]
+    if sector_index is None:
+        sector_index = build_sector_index(templates)
+    matched_positions = set(sector_index.get(entity_sector, ())) | set(sector_index.get(gics_sector, ()))
+    sector_matched = [templates[i] for i in sorted(matched_positions)]
     
     # Use sector-matched templates if available, otherwise use all templates
     candidate_templates = sector_matched if sector_matched else templates
     
     # Deterministic selection using MD5 hash (Python's hash() is randomized per-process)
     hash_input = f"{entity_id}:{doc_type}:{config.RNG_SEED}".encode('utf-8')
-    hash_value = int(hashlib.md5(hash_input).hexdigest(), 16)
+    hash_value = int.from_bytes(hashlib.md5(hash_input).digest(), 'big')
     template_index = hash_value % len(candidate_templates)
     selected = candidate_templates[template_index]
     
     return selected
 
+@lru_cache(maxsize=1)
+def _sic_keyword_patterns() -> Tuple[Tuple[str, re.Pattern], ...]:
+    """Compile each GICS sector's SIC keywords into one alternation regex, in config order."""
+    return tuple(
+        (gics_sector, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+        for gics_sector, keywords in config.SIC_TO_GICS_MAPPING.items()
+        if keywords
+    )
+
+@lru_cache(maxsize=None)
 def map_sic_to_gics(sic_description: str) -> str:
     """
     Map SIC industry description to GICS sector for template matching.
@@ -249,9 +288,9 @@ def map_sic_to_gics(sic_description: str) -> str:
     """
     sic_lower = sic_description.lower()
     
-    # Check each GICS sector's keywords from config
-    for gics_sector, keywords in config.SIC_TO_GICS_MAPPING.items():
-        if any(keyword in sic_lower for keyword in keywords):
+    # Check each GICS sector's keywords from config (first sector with a hit wins)
+    for gics_sector, pattern in _sic_keyword_patterns():
+        if pattern.search(sic_lower):
             return gics_sector
     
     # Default to empty if no match
@@ -321,8 +360,8 @@ def build_security_context(session: Session, security_id: int, doc_type: str) ->
             di.CIK
         FROM {config.DATABASE['name']}.CURATED.DIM_SECURITY ds
         JOIN {config.DATABASE['name']}.CURATED.DIM_ISSUER di ON ds.IssuerID = di.IssuerID
-        WHERE ds.SecurityID = {security_id}
-    """).collect()
+        WHERE ds.SecurityID = ?
+    """, params=[security_id]).collect()
     
     if not security_data:
         raise ValueError(f"Security {security_id} not found in DIM_SECURITY")
@@ -374,8 +413,8 @@ def build_portfolio_context(session: Session, portfolio_id: int, doc_type: str)
             BaseCurrency,
             InceptionDate
         FROM {config.DATABASE['name']}.CURATED.DIM_PORTFOLIO
-        WHERE PortfolioID = {portfolio_id}
-    """).collect()
+        WHERE PortfolioID = ?
+    """, params=[portfolio_id]).collect()
     
     if not portfolio_data:
         raise ValueError(f"Portfolio {portfolio_id} not found")
@@ -427,9 +466,9 @@ def build_issuer_context(session: Session, issuer_id: int, doc_type: str) -> Dic
             ds.Ticker
         FROM {config.DATABASE['name']}.CURATED.DIM_ISSUER di
         LEFT JOIN {config.DATABASE['name']}.CURATED.DIM_SECURITY ds ON di.IssuerID = ds.IssuerID
-        WHERE di.IssuerID = {issuer_id}
+        WHERE di.IssuerID = ?
         LIMIT 1
-    """).collect()
+    """, params=[issuer_id]).collect()
     
     if not issuer_data:
         raise ValueError(f"Issuer {issuer_id} not found")
@@ -483,7 +522,8 @@ def build_global_context(doc_type: str, doc_num: int = 0) -> Dict[str, Any]:
     return context
 
 
-def get_breach_context_for_issuer(session: Session, issuer_id: int) -> Optional[Dict[str, Any]]:
+def get_breach_context_for_issuer(session: Session, issuer_id: int,
+                                  breach_row: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
     """
     Query FACT_COMPLIANCE_ALERTS for breach data to enrich engagement note context.
     
@@ -493,39 +533,43 @@ def get_breach_context_for_issuer(session: Session, issuer_id: int) -> Optional[
     Args:
         session: Snowpark session
         issuer_id: IssuerID to look up breaches for
+        breach_row: Optional row from prefetch_issuers_with_breaches(); skips the query
     
     Returns:
         Dict with breach context fields, or None if no breach found for this issuer
     """
     database_name = config.DATABASE['name']
     
-    breach_data = session.sql(f"""
-        SELECT 
-            ca.CurrentValue,
-            ca.OriginalValue,
-            ca.AlertDate,
-            ca.ActionDeadline,
-            ca.ResolvedBy,
-            ca.ResolutionNotes,
-            ca.AlertSeverity,
-            ca.AlertType,
-            p.PortfolioName,
-            s.Ticker
-        FROM {database_name}.CURATED.FACT_COMPLIANCE_ALERTS ca
-        JOIN {database_name}.CURATED.DIM_PORTFOLIO p ON ca.PortfolioID = p.PortfolioID
-        JOIN {database_name}.CURATED.DIM_SECURITY s ON ca.SecurityID = s.SecurityID
-        WHERE s.IssuerID = {issuer_id}
-          AND ca.AlertType IN ('CONCENTRATION_BREACH', 'CONCENTRATION_WARNING')
-        ORDER BY 
-            CASE ca.AlertType WHEN 'CONCENTRATION_BREACH' THEN 1 ELSE 2 END,
-            ca.AlertDate DESC
-        LIMIT 1
-    """).collect()
-    
-    if not breach_data:
-        return None
-    
-    b = breach_data[0]
+    if breach_row is not None:
+        b = breach_row
+    else:
+        breach_data = session.sql(f"""
+            SELECT 
+                ca.CurrentValue,
+                ca.OriginalValue,
+                ca.AlertDate,
+                ca.ActionDeadline,
+                ca.ResolvedBy,
+                ca.ResolutionNotes,
+                ca.AlertSeverity,
+                ca.AlertType,
+                p.PortfolioName,
+                s.Ticker
+            FROM {database_name}.CURATED.FACT_COMPLIANCE_ALERTS ca
+            JOIN {database_name}.CURATED.DIM_PORTFOLIO p ON ca.PortfolioID = p.PortfolioID
+            JOIN {database_name}.CURATED.DIM_SECURITY s ON ca.SecurityID = s.SecurityID
+            WHERE s.IssuerID = ?
+              AND ca.AlertType IN ('CONCENTRATION_BREACH', 'CONCENTRATION_WARNING')
+            ORDER BY 
+                CASE ca.AlertType WHEN 'CONCENTRATION_BREACH' THEN 1 ELSE 2 END,
+                ca.AlertDate DESC
+            LIMIT 1
+        """, params=[issuer_id]).collect()
+        
+        if not breach_data:
+            return None
+        
+        b = breach_data[0]
     
     # Parse weight values (stored as strings like "7.2%")
     current_weight = b['CURRENTVALUE'] if b['CURRENTVALUE'] else '7.0%'
@@ -560,32 +604,50 @@ def get_breach_context_for_issuer(session: Session, issuer_id: int) -> Optional[
     }
 
 
-def prefetch_issuers_with_breaches(session: Session) -> set:
+def prefetch_issuers_with_breaches(session: Session) -> Dict[int, Any]:
     """
-    Get set of IssuerIDs that have concentration breaches or warnings.
+    Get the IssuerIDs that have concentration breaches or warnings, each with
+    its most relevant alert row (breaches before warnings, then most recent).
     
     Used to determine which issuers should get "Compliance Discussion" 
-    meeting type for engagement notes.
+    meeting type for engagement notes, and to build their breach context
+    without a per-issuer query.
     
     Args:
         session: Snowpark session
     
     Returns:
-        Set of IssuerIDs that have breach/warning alerts
+        Dict of IssuerID -> alert row (see get_breach_context_for_issuer)
     """
     database_name = config.DATABASE['name']
     
     try:
         result = session.sql(f"""
-            SELECT DISTINCT s.IssuerID
+            SELECT 
+                s.IssuerID,
+                ca.CurrentValue,
+                ca.OriginalValue,
+                ca.AlertDate,
+                ca.ActionDeadline,
+                ca.ResolvedBy,
+                ca.ResolutionNotes,
+                ca.AlertSeverity,
+                ca.AlertType,
+                p.PortfolioName,
+                s.Ticker
             FROM {database_name}.CURATED.FACT_COMPLIANCE_ALERTS ca
+            JOIN {database_name}.CURATED.DIM_PORTFOLIO p ON ca.PortfolioID = p.PortfolioID
             JOIN {database_name}.CURATED.DIM_SECURITY s ON ca.SecurityID = s.SecurityID
             WHERE ca.AlertType IN ('CONCENTRATION_BREACH', 'CONCENTRATION_WARNING')
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY s.IssuerID
+                ORDER BY CASE ca.AlertType WHEN 'CONCENTRATION_BREACH' THEN 1 ELSE 2 END, ca.AlertDate DESC
+            ) = 1
         """).collect()
-        return {row['ISSUERID'] for row in result}
+        return {row['ISSUERID']: row for row in result}
     except Exception as e:
         log_warning(f"  Could not prefetch breach data: {e}")
-        return set()
+        return {}
 
 
 # ============================================================================
@@ -619,12 +681,12 @@ def get_fiscal_calendar_dates(session: Session, cik: str, num_periods: int = 4)
                 PERIOD_START_DATE,
                 DAYS_IN_PERIOD
             FROM {config.REAL_DATA_SOURCES['database']}.{config.REAL_DATA_SOURCES['schema']}.SEC_FISCAL_CALENDARS
-            WHERE CIK = '{cik}'
+            WHERE CIK = ?
                 AND FISCAL_PERIOD IN ('Q1', 'Q2', 'Q3', 'Q4')  -- Only quarterly data
                 AND PERIOD_END_DATE IS NOT NULL
             ORDER BY PERIOD_END_DATE DESC
-            LIMIT {num_periods}
-        """).collect()
+            LIMIT {int(num_periods)}
+        """, params=[cik]).collect()
         
         if not fiscal_data:
             return []
@@ -743,15 +805,36 @@ def generate_dates_for_doc_type(doc_type: str, context: Optional[Dict[str, Any]]
 # MODULE: Provider and Attribution Context
 # ============================================================================
 
+# Fixed name pools for provider context (investment memo competitors by sector,
+# press release placeholders)
+_TECH_COMPETITORS = ('Salesforce', 'Oracle', 'SAP', 'Adobe', 'ServiceNow', 'Workday', 'Splunk', 'Datadog')
+_HEALTHCARE_COMPETITORS = ('Pfizer', 'Johnson & Johnson', 'AbbVie', 'Merck', 'Bristol-Myers Squibb', 'Eli Lilly')
+_FINANCIAL_COMPETITORS = ('JPMorgan', 'Bank of America', 'Goldman Sachs', 'Morgan Stanley', 'Wells Fargo')
+_PRESS_RELEASE_CITIES = ('New York', 'San Francisco', 'Boston', 'Seattle', 'London', 'Frankfurt')
+_DRUG_NAMES = ('InnovaRx', 'BioAdvance', 'TherapX', 'MediCure', 'HealthPlus')
+_INDICATIONS = ('Type 2 Diabetes', 'Cardiovascular Disease', 'Oncology', 'Immunology')
+_PRODUCT_CATEGORIES = ('Cloud Platform', 'AI Suite', 'Analytics Dashboard', 'Security Solution', 'Mobile App', 'Data Platform')
+
+# Meeting types for engagement notes on issuers without breach data (Compliance
+# Discussion excluded; only types that have matching templates)
+_NON_COMPLIANCE_MEETING_TYPES = {
+    'Management Meeting': 0.60,
+    'Shareholder Call': 0.40
+}
+_NON_COMPLIANCE_MEETING_CDF = (
+    tuple(_NON_COMPLIANCE_MEETING_TYPES),
+    tuple(accumulate(_NON_COMPLIANCE_MEETING_TYPES.values()))
+)
+
 def generate_provider_context(context: Dict[str, Any], doc_type: str, 
-                              issuers_with_breaches: Optional[set] = None) -> Dict[str, Any]:
+                              issuers_with_breaches: Optional[Dict[int, Any]] = None) -> Dict[str, Any]:
     """
     Generate provider names, ratings, severity levels, etc.
     
     Args:
         context: Existing context
         doc_type: Document type
-        issuers_with_breaches: Optional set of IssuerIDs that have concentration breaches
+        issuers_with_breaches: Optional IssuerID -> breach alert row map (prefetch_issuers_with_breaches)
                                (used for engagement notes to determine Compliance Discussion meeting type)
     
     Returns:
@@ -760,14 +843,18 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
     provider_context = {}
     entity_id = context.get('SECURITY_ID') or context.get('ISSUER_ID') or context.get('PORTFOLIO_ID') or 0
     
+    # Per-entity generator for stable name/index picks (str seeds are hashed with
+    # SHA-512, so unlike hash() the picks do not change between processes)
+    rng = random.Random(f"{entity_id}:{config.RNG_SEED}")
+    
     if doc_type in ['broker_research', 'internal_research', 'investment_memo']:
         # Select fictional broker from YAML rules
         fictional_brokers = rules_loader.get_fictional_brokers()
-        broker_index = hash(f"{entity_id}:broker:{config.RNG_SEED}") % len(fictional_brokers)
+        broker_index = rng.randrange(len(fictional_brokers))
         provider_context['BROKER_NAME'] = fictional_brokers[broker_index]
         
         # Generate analyst name
-        analyst_id = (hash(f"{entity_id}:analyst:{config.RNG_SEED}") % 100) + 1
+        analyst_id = rng.randrange(100) + 1
         provider_context['ANALYST_NAME'] = f'Analyst_{analyst_id:02d}'
         
         # Select rating from distribution
@@ -778,20 +865,16 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
             provider_context['PORTFOLIO_NAME'] = config.DEFAULT_DEMO_PORTFOLIO
         
         # Add investment memo specific placeholders (competitors, etc.)
-        tech_competitors = ['Salesforce', 'Oracle', 'SAP', 'Adobe', 'ServiceNow', 'Workday', 'Splunk', 'Datadog']
-        healthcare_competitors = ['Pfizer', 'Johnson & Johnson', 'AbbVie', 'Merck', 'Bristol-Myers Squibb', 'Eli Lilly']
-        financial_competitors = ['JPMorgan', 'Bank of America', 'Goldman Sachs', 'Morgan Stanley', 'Wells Fargo']
-        
         sector = context.get('SIC_DESCRIPTION', 'Information Technology')
         if 'Health' in sector or 'Pharma' in sector or 'Medical' in sector:
-            competitors = healthcare_competitors
+            competitors = _HEALTHCARE_COMPETITORS
         elif 'Financ' in sector or 'Bank' in sector or 'Insurance' in sector:
-            competitors = financial_competitors
+            competitors = _FINANCIAL_COMPETITORS
         else:
-            competitors = tech_competitors
+            competitors = _TECH_COMPETITORS
         
         # Select 3 different competitors deterministically
-        comp1_idx = hash(f"{entity_id}:comp1:{config.RNG_SEED}") % len(competitors)
+        comp1_idx = rng.randrange(len(competitors))
         comp2_idx = (comp1_idx + 1) % len(competitors)
         comp3_idx = (comp1_idx + 2) % len(competitors)
         provider_context['COMPETITOR_1'] = competitors[comp1_idx]
@@ -805,7 +888,7 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
         # Select NGO from appropriate category (from YAML rules)
         fictional_ngos = rules_loader.get_fictional_ngos()
         category_ngos = fictional_ngos.get(category, fictional_ngos.get('environmental', []))
-        ngo_index = hash(f"{entity_id}:ngo:{category}:{config.RNG_SEED}") % len(category_ngos) if category_ngos else 0
+        ngo_index = rng.randrange(len(category_ngos)) if category_ngos else 0
         provider_context['NGO_NAME'] = category_ngos[ngo_index] if category_ngos else 'Global Sustainability Watch'
         
         # Select severity level
@@ -834,20 +917,10 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
             provider_context['MEETING_TYPE'] = 'Compliance Discussion'
         else:
             # No breach data - use other meeting types (exclude Compliance Discussion)
-            # Only include meeting types that have matching templates
-            non_compliance_types = {
-                'Management Meeting': 0.60,
-                'Shareholder Call': 0.40
-            }
-            # Select from distribution excluding Compliance Discussion
+            meeting_types, cdf = _NON_COMPLIANCE_MEETING_CDF
             rand_val = random.random()
-            cumulative = 0.0
-            selected = 'Management Meeting'
-            for meeting_type, weight in non_compliance_types.items():
-                cumulative += weight
-                if rand_val <= cumulative:
-                    selected = meeting_type
-                    break
+            idx = bisect.bisect_left(cdf, rand_val)
+            selected = meeting_types[idx] if idx < len(meeting_types) else 'Management Meeting'
             provider_context['MEETING_TYPE'] = selected
         
         # Add ESG engagement metrics
@@ -864,15 +937,14 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
     
     elif doc_type == 'press_releases':
         # Add common press release fields
-        cities = ['New York', 'San Francisco', 'Boston', 'Seattle', 'London', 'Frankfurt']
-        city_index = hash(f"{entity_id}:city:{config.RNG_SEED}") % len(cities)
-        provider_context['CITY'] = cities[city_index]
+        city_index = rng.randrange(len(_PRESS_RELEASE_CITIES))
+        provider_context['CITY'] = _PRESS_RELEASE_CITIES[city_index]
         
         # Generate executive name deterministically
-        ceo_id = hash(f"{entity_id}:ceo:{config.RNG_SEED}") % 100
+        ceo_id = rng.randrange(100)
         provider_context['CEO_NAME'] = f'CEO_{ceo_id:02d}'
         
-        cfo_id = hash(f"{entity_id}:cfo:{config.RNG_SEED}") % 100
+        cfo_id = rng.randrange(100)
         provider_context['CFO_NAME'] = f'CFO_{cfo_id:02d}'
         
         # Acquisition-specific
@@ -889,13 +961,11 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
         provider_context['GUIDANCE_GROWTH'] = str(round(random.uniform(10, 25), 0))
         
         # Healthcare press release specific
-        drug_names = ['InnovaRx', 'BioAdvance', 'TherapX', 'MediCure', 'HealthPlus']
-        drug_index = hash(f"{entity_id}:drug:{config.RNG_SEED}") % len(drug_names)
-        provider_context['DRUG_NAME'] = drug_names[drug_index]
+        drug_index = rng.randrange(len(_DRUG_NAMES))
+        provider_context['DRUG_NAME'] = _DRUG_NAMES[drug_index]
         
-        indications = ['Type 2 Diabetes', 'Cardiovascular Disease', 'Oncology', 'Immunology']
-        indication_index = hash(f"{entity_id}:indication:{config.RNG_SEED}") % len(indications)
-        provider_context['INDICATION'] = indications[indication_index]
+        indication_index = rng.randrange(len(_INDICATIONS))
+        provider_context['INDICATION'] = _INDICATIONS[indication_index]
         
         provider_context['TRIAL_PATIENTS'] = f'{random.randint(500, 3000):,}'
         provider_context['MARKET_SIZE'] = str(random.randint(5, 50))
@@ -915,12 +985,39 @@ def generate_provider_context(context: Dict[str, Any], doc_type: str,
         provider_context['CLOSE_YEAR'] = str(datetime.now().year)
         
         # Product launch placeholders  
-        products = ['Cloud Platform', 'AI Suite', 'Analytics Dashboard', 'Security Solution', 'Mobile App', 'Data Platform']
-        product_index = hash(f"{entity_id}:product:{config.RNG_SEED}") % len(products)
-        provider_context['PRODUCT_CATEGORY'] = products[product_index]
+        product_index = rng.randrange(len(_PRODUCT_CATEGORIES))
+        provider_context['PRODUCT_CATEGORY'] = _PRODUCT_CATEGORIES[product_index]
     
     return provider_context
 
+# Load distributions from numeric_bounds.yaml (simplified for now)
+_DISTRIBUTIONS = {
+    'rating': {
+        'Strong Buy': 0.10,
+        'Buy': 0.25,
+        'Hold': 0.45,
+        'Sell': 0.15,
+        'Strong Sell': 0.05
+    },
+    'severity_level': {
+        'High': 0.20,
+        'Medium': 0.40,
+        'Low': 0.40
+    },
+    'meeting_type': {
+        'Management Meeting': 0.40,
+        'Shareholder Call': 0.25,
+        'Site Visit': 0.15,
+        'Compliance Discussion': 0.20
+    }
+}
+
+# name -> (values, cumulative weights), so each draw skips re-accumulating weights
+_DISTRIBUTION_CDFS = {
+    name: (list(dist), list(accumulate(dist.values())))
+    for name, dist in _DISTRIBUTIONS.items()
+}
+
 def select_from_distribution(distribution_name: str) -> str:
     """
     Select value from configured distribution.
@@ -931,36 +1028,12 @@ def select_from_distribution(distribution_name: str) -> str:
     Returns:
         Selected value
     """
-    # Load distributions from numeric_bounds.yaml (simplified for now)
-    distributions = {
-        'rating': {
-            'Strong Buy': 0.10,
-            'Buy': 0.25,
-            'Hold': 0.45,
-            'Sell': 0.15,
-            'Strong Sell': 0.05
-        },
-        'severity_level': {
-            'High': 0.20,
-            'Medium': 0.40,
-            'Low': 0.40
-        },
-        'meeting_type': {
-            'Management Meeting': 0.40,
-            'Shareholder Call': 0.25,
-            'Site Visit': 0.15,
-            'Compliance Discussion': 0.20
-        }
-    }
-    
-    if distribution_name not in distributions:
+    if distribution_name not in _DISTRIBUTION_CDFS:
         raise ValueError(f"Unknown distribution: {distribution_name}")
     
-    dist = distributions[distribution_name]
-    values = list(dist.keys())
-    weights = list(dist.values())
+    values, cum_weights = _DISTRIBUTION_CDFS[distribution_name]
     
-    return random.choices(values, weights=weights)[0]
+    return random.choices(values, cum_weights=cum_weights)[0]
 
 # ============================================================================
 # MODULE: Numeric Rules (Tier 1)
@@ -1042,6 +1115,8 @@ def query_tier2_portfolio_metrics(session: Session, portfolio_id: int) -> Dict[s
     metrics = {}
     
     try:
+        max_holding_date = get_max_holding_date(session)
+        
         # Query top 10 holdings
         top10 = session.sql(f"""
             SELECT 
@@ -1051,11 +1126,11 @@ def query_tier2_portfolio_metrics(session: Session, portfolio_id: int) -> Dict[s
                 p.MarketValue_Base as MARKET_VALUE_USD
             FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR p
             JOIN {config.DATABASE['name']}.CURATED.DIM_SECURITY s ON p.SecurityID = s.SecurityID
-            WHERE p.PortfolioID = {portfolio_id}
-            AND p.HoldingDate = (SELECT MAX(HoldingDate) FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR)
+            WHERE p.PortfolioID = ?
+            AND p.HoldingDate = ?
             ORDER BY p.MarketValue_Base DESC
             LIMIT 10
-        """).collect()
+        """, params=[portfolio_id, max_holding_date]).collect()
         
         if top10:
             metrics['TOP10_HOLDINGS'] = top10
@@ -1072,11 +1147,11 @@ def query_tier2_portfolio_metrics(session: Session, portfolio_id: int) -> Dict[s
             FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR p
             JOIN {config.DATABASE['name']}.CURATED.DIM_SECURITY s ON p.SecurityID = s.SecurityID
             JOIN {config.DATABASE['name']}.CURATED.DIM_ISSUER i ON s.IssuerID = i.IssuerID
-            WHERE p.PortfolioID = {portfolio_id}
-            AND p.HoldingDate = (SELECT MAX(HoldingDate) FROM {config.DATABASE['name']}.CURATED.FACT_POSITION_DAILY_ABOR)
+            WHERE p.PortfolioID = ?
+            AND p.HoldingDate = ?
             GROUP BY i.SIC_DESCRIPTION
             ORDER BY WEIGHT_PCT DESC
-        """).collect()
+        """, params=[portfolio_id, max_holding_date]).collect()
         
         if sectors:
             metrics['SECTOR_ALLOCATION_TABLE'] = sectors
@@ -1366,6 +1441,7 @@ def hydrate_documents(session: Session, doc_type: str, test_mode: bool = False)
     
     # Load templates
     templates = load_templates(doc_type)
+    sector_index = build_sector_index(templates)
     
     # Get entities to hydrate
     entities = get_entities_for_doc_type(session, doc_type, test_mode)
@@ -1425,7 +1501,7 @@ def hydrate_documents(session: Session, doc_type: str, test_mode: bool = False)
                 )
     
     # Prefetch issuers with breaches for engagement_notes (for Compliance Discussion meeting type)
-    issuers_with_breaches: set = set()
+    issuers_with_breaches: Dict[int, Any] = {}
     if doc_type == 'engagement_notes':
         issuers_with_breaches = prefetch_issuers_with_breaches(session)
         if issuers_with_breaches:
@@ -1457,7 +1533,7 @@ def hydrate_documents(session: Session, doc_type: str, test_mode: bool = False)
                     doc_type,
                     fiscal_calendar_cache,
                     session,  # Pass session for breach context queries (engagement notes)
-                    issuers_with_breaches  # Pass breach set for Compliance Discussion meeting type
+                    issuers_with_breaches  # Pass breach map for Compliance Discussion meeting type
                 )
             elif linkage_level == 'portfolio':
                 context = build_portfolio_context_from_prefetch(
@@ -1476,7 +1552,7 @@ def hydrate_documents(session: Session, doc_type: str, test_mode: bool = False)
             if doc_type == 'portfolio_review':
                 template = select_portfolio_review_variant(templates, context)
             else:
-                template = select_template(templates, context)
+                template = select_template(templates, context, sector_index)
             
             # Override SEVERITY_LEVEL from template metadata for NGO reports
             # This ensures metadata field matches hardcoded severity in template body
@@ -1704,7 +1780,7 @@ def build_issuer_context_from_prefetch(
     doc_type: str,
     fiscal_calendar_cache: Dict[str, List[Dict[str, Any]]],
     session: Optional[Session] = None,
-    issuers_with_breaches: Optional[set] = None
+    issuers_with_breaches: Optional[Dict[int, Any]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Build context for issuer-level documents from prefetched data.
@@ -1715,7 +1791,7 @@ def build_issuer_context_from_prefetch(
         doc_type: Document type
         fiscal_calendar_cache: Prefetched fiscal calendar data keyed by CIK
         session: Optional Snowpark session for breach context queries
-        issuers_with_breaches: Optional set of IssuerIDs that have concentration breaches
+        issuers_with_breaches: Optional IssuerID -> breach alert row map (prefetch_issuers_with_breaches)
     
     Returns:
         Context dict or None if prefetched_row is missing
@@ -1752,7 +1828,9 @@ def build_issuer_context_from_prefetch(
         if meeting_type == 'Compliance Discussion':
             issuer_id = context.get('ISSUER_ID')
             if issuer_id:
-                breach_ctx = get_breach_context_for_issuer(session, issuer_id)
+                breach_ctx = get_breach_context_for_issuer(
+                    session, issuer_id, (issuers_with_breaches or {}).get(issuer_id)
+                )
                 if breach_ctx:
                     # Breach found - enrich context with breach-specific data
                     context.update(breach_ctx)
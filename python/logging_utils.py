@@ -69,6 +69,14 @@ def log_substep(step_name: str):
         print(f"    → {step_name}...")
 
 
+def is_detail_enabled() -> bool:
+    """True when log_detail() output is shown (verbosity >= 2).
+    
+    Use to skip work that only feeds detail logging, e.g. row-count queries.
+    """
+    return VERBOSITY >= 2
+
+
 def log_detail(message: str):
     """Log detailed info (shown at verbosity >= 2)"""
     if VERBOSITY >= 2:
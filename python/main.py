@@ -282,17 +282,10 @@ def main():
                     generate_structured.build_security_returns_view(session)
                     generate_structured.build_esg_latest_view(session)  # Rebuild to include returns
                     
-                    # Build strategy performance table (requires V_HOLDINGS_WITH_ESG with returns)
-                    log_substep("Strategy performance metrics")
-                    generate_structured.build_fact_strategy_performance(session)
-                    
-                    # Build benchmark performance table (requires FACT_STOCK_PRICES and FACT_BENCHMARK_HOLDINGS)
-                    log_substep("Benchmark performance metrics")
-                    generate_structured.build_fact_benchmark_performance(session)
-                    
-                    # Build portfolio vs benchmark comparison view (requires V_HOLDINGS_WITH_ESG and FACT_BENCHMARK_PERFORMANCE)
-                    log_substep("Portfolio vs benchmark comparison view")
-                    generate_structured.build_portfolio_benchmark_comparison_view(session)
+                    # Build strategy performance, benchmark performance and portfolio vs benchmark
+                    # comparison (requires V_HOLDINGS_WITH_ESG with returns and FACT_BENCHMARK_HOLDINGS)
+                    log_substep("Strategy and benchmark performance metrics")
+                    generate_structured.build_performance_tables(session)
                 except Exception as e:
                     log_error(f"MARKET_DATA generation failed: {e}")
                     log_error("Market data is required for performance metrics in semantic views.")
@@ -17,7 +17,7 @@
 Snowflake I/O Utilities
 
 This module provides:
-- cleanup_temp_stages(): Clean up leftover Snowpark temp stages
+- cleanup_temp_objects(): Clean up leftover Snowpark temp stages and file formats
 - prefetch_* functions: Batch data lookups for hydration (avoid per-entity queries)
 
 For writes, use native session.write_pandas() directly.
@@ -28,7 +28,7 @@ from typing import Dict, List, Any, Tuple
 from snowflake.snowpark import Session
 
 
-def cleanup_temp_objects(session: Session) -> None:
+def cleanup_temp_objects(session: Session, database_name: str, schema_names: List[str]) -> None:
     """
     Clean up any leftover Snowpark temp objects that may cause conflicts.
     
@@ -39,33 +39,42 @@ def cleanup_temp_objects(session: Session) -> None:
     If a previous run was interrupted, these may persist and cause
     'Object already exists' errors on subsequent runs.
     
-    Safe to call before session.write_pandas().
+    Called once per build from create_database_structure(); temp objects created by
+    write_pandas are session-scoped and dropped when the session closes.
+    
+    Args:
+        session: Active Snowpark session
+        database_name: Database to clean up
+        schema_names: Schemas within database_name to clean up
     """
-    # Clean up temp stages
-    try:
-        stages = session.sql("SHOW STAGES LIKE 'SNOWPARK_TEMP_STAGE_%'").collect()
-        for stage in stages:
-            try:
-                session.sql(f"DROP STAGE IF EXISTS {stage['name']}").collect()
-            except Exception:
-                pass
-    except Exception:
-        pass
+    if not schema_names:
+        return
     
-    # Clean up temp file formats
+    # Find stale temp stages and file formats in the target schemas with one
+    # INFORMATION_SCHEMA query (independent of the session's current schema)
+    schema_placeholders = ", ".join("?" for _ in schema_names)
     try:
-        formats = session.sql("SHOW FILE FORMATS LIKE 'SNOWPARK_TEMP_FILE_FORMAT_%'").collect()
-        for fmt in formats:
-            try:
-                session.sql(f"DROP FILE FORMAT IF EXISTS {fmt['name']}").collect()
-            except Exception:
-                pass
+        stale = session.sql(f"""
+            SELECT 'STAGE' as OBJECT_TYPE, STAGE_SCHEMA as OBJECT_SCHEMA, STAGE_NAME as OBJECT_NAME
+            FROM {database_name}.INFORMATION_SCHEMA.STAGES
+            WHERE STAGE_SCHEMA IN ({schema_placeholders}) AND STAGE_NAME LIKE 'SNOWPARK_TEMP_STAGE_%'
+            UNION ALL
+            SELECT 'FILE FORMAT', FILE_FORMAT_SCHEMA, FILE_FORMAT_NAME
+            FROM {database_name}.INFORMATION_SCHEMA.FILE_FORMATS
+            WHERE FILE_FORMAT_SCHEMA IN ({schema_placeholders}) AND FILE_FORMAT_NAME LIKE 'SNOWPARK_TEMP_FILE_FORMAT_%'
+        """, params=[*schema_names, *schema_names]).collect()
     except Exception:
-        pass
-
-
-# Keep old name for backward compatibility
-cleanup_temp_stages = cleanup_temp_objects
+        return
+    
+    # Drop each object independently so one failure does not skip the rest
+    for row in stale:
+        try:
+            session.sql(
+                f'DROP {row["OBJECT_TYPE"]} IF EXISTS '
+                f'{database_name}."{row["OBJECT_SCHEMA"]}"."{row["OBJECT_NAME"]}"'
+            ).collect()
+        except Exception:
+            pass
 
 
 # =============================================================================
@@ -226,7 +235,7 @@ def prefetch_fiscal_calendars(
     if not valid_ciks:
         return {}
     
-    cik_list = ", ".join(f"'{c}'" for c in valid_ciks)
+    cik_placeholders = ", ".join("?" for _ in valid_ciks)
     
     try:
         rows = session.sql(f"""
@@ -240,12 +249,12 @@ def prefetch_fiscal_calendars(
                 DAYS_IN_PERIOD,
                 ROW_NUMBER() OVER (PARTITION BY CIK ORDER BY PERIOD_END_DATE DESC) as rn
             FROM {real_data_database}.{real_data_schema}.SEC_FISCAL_CALENDARS
-            WHERE CIK IN ({cik_list})
+            WHERE CIK IN ({cik_placeholders})
                 AND FISCAL_PERIOD IN ('Q1', 'Q2', 'Q3', 'Q4')
                 AND PERIOD_END_DATE IS NOT NULL
             QUALIFY rn <= {num_periods}
             ORDER BY CIK, PERIOD_END_DATE DESC
-        """).collect()
+        """, params=valid_ciks).collect()
         
         # Build dict of lists
         result: Dict[str, List[Dict[str, Any]]] = {}
@@ -292,7 +301,7 @@ def prefetch_sec_financials(
     if not valid_ciks:
         return {}
     
-    cik_list = ", ".join(f"'{c}'" for c in valid_ciks)
+    cik_placeholders = ", ".join("?" for _ in valid_ciks)
     
     try:
         rows = session.sql(f"""
@@ -325,7 +334,7 @@ def prefetch_sec_financials(
                     LAG(REVENUE, 4) OVER (PARTITION BY CIK ORDER BY PERIOD_END_DATE) as REVENUE_PRIOR_YEAR,
                     ROW_NUMBER() OVER (PARTITION BY CIK ORDER BY PERIOD_END_DATE DESC) as rn
                 FROM {database_name}.MARKET_DATA.FACT_SEC_FINANCIALS
-                WHERE CIK IN ({cik_list})
+                WHERE CIK IN ({cik_placeholders})
                   AND FISCAL_PERIOD IN ('Q1', 'Q2', 'Q3', 'Q4')
             )
             SELECT 
@@ -338,7 +347,7 @@ def prefetch_sec_financials(
             FROM ranked_financials
             WHERE rn <= {num_periods}
             ORDER BY CIK, PERIOD_END_DATE DESC
-        """).collect()
+        """, params=valid_ciks).collect()
         
         # Build nested dict: cik -> (year, period) -> metrics
         result: Dict[str, Dict[Tuple[int, str], Dict[str, Any]]] = {}
@@ -40,3 +40,58 @@ def safe_sql_tuple(items: list, default_value: str = "'__NONE__'") -> str:
     quoted_items = [f"'{item}'" for item in items]
     # SQL doesn't use trailing comma for single items (unlike Python)
     return f"({', '.join(quoted_items)})"
+
+
+def sql_array_construct(items: list) -> str:
+    """
+    Convert a list of strings to a SQL ARRAY_CONSTRUCT literal with single quotes escaped.
+    
+    Use with GET(<array>, <index>)::VARCHAR for O(1) positional lookups instead of
+    long CASE ... WHEN chains.
+    
+    Args:
+        items: List of string values
+    
+    Returns:
+        String like ARRAY_CONSTRUCT('a', 'b', 'c')
+    """
+    quoted_items = [f"'{str(item).replace(chr(39), chr(39) * 2)}'" for item in items]
+    return f"ARRAY_CONSTRUCT({', '.join(quoted_items)})"
+
+
+def sql_literal(value) -> str:
+    """
+    Format a Python value as a SQL literal (strings quoted with single quotes escaped).
+    
+    Args:
+        value: str, int, float, bool or None
+    
+    Returns:
+        SQL literal string (NULL for None, TRUE/FALSE for bools)
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return f"'{str(value).replace(chr(39), chr(39) * 2)}'"
+
+
+def sql_values_rows(rows: list, columns: list) -> str:
+    """
+    Convert a list of dicts to the row list of a SQL VALUES clause.
+    
+    Use as `SELECT * FROM (VALUES {rows}) AS t(col1, col2, ...)` to build small
+    config-defined tables in a single CTAS (no write_pandas stage/PUT/COPY).
+    
+    Args:
+        rows: List of dicts keyed by column name
+        columns: Column names, in VALUES order
+    
+    Returns:
+        String like (1, 'a'),\n(2, 'b')
+    """
+    return ",\n            ".join(
+        "(" + ", ".join(sql_literal(row[col]) for col in columns) + ")" for row in rows
+    )
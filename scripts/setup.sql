@@ -305,14 +305,8 @@ def run_setup(session, test_mode: bool = False) -> str:
         generate_structured.build_esg_latest_view(session)
         results.append("  Security returns and ESG views complete!")
         
-        generate_structured.build_fact_strategy_performance(session)
-        results.append("  Strategy performance complete!")
-        
-        generate_structured.build_fact_benchmark_performance(session)
-        results.append("  Benchmark performance complete!")
-        
-        generate_structured.build_portfolio_benchmark_comparison_view(session)
-        results.append("  Portfolio vs benchmark view complete!")
+        generate_structured.build_performance_tables(session)
+        results.append("  Strategy performance, benchmark performance and portfolio vs benchmark view complete!")
     except Exception as e:
         results.append(f"  ERROR building performance views: {e}")
         raise